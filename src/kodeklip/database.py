@@ -5,80 +5,176 @@ This module handles SQLite database setup, table creation, and provides
 session management utilities for database operations.
 """
 
+import os
+import threading
+from collections import OrderedDict
 from collections.abc import Generator
 from contextlib import contextmanager
 from pathlib import Path
+from typing import Any
 
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from sqlalchemy.engine.base import Engine
-from sqlmodel import Session, SQLModel, create_engine, text
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+# Database paths may be given as strings or path-like objects (e.g. Path)
+StrPath = str | os.PathLike[str]
 
 
 class DatabaseConfig:
     """Configuration for database setup."""
 
-    def __init__(self, db_path: str | None = None):
+    def __init__(self, db_path: StrPath | None = None):
         """Initialize database configuration.
 
         Args:
-            db_path: Optional custom database path. Defaults to ~/.kodeklip/db.sqlite
+            db_path: Optional custom database path (str or path-like), or an
+                SQLite URI filename such as "file:name?mode=memory&cache=shared".
+                Defaults to the KODEKLIP_DB_PATH environment variable, then
+                ~/.kodeklip/db.sqlite
+
+        KODEKLIP_DATABASE_URL, if set, replaces the URL of the default
+        database (e.g. "sqlite://" for an in-memory database in tests).
+        Explicit paths elsewhere keep their own file.
         """
-        if db_path is None:
-            # Default to ~/.kodeklip/db.sqlite
-            home = Path.home()
-            self.kodeklip_dir = home / ".kodeklip"
-            self.db_path = self.kodeklip_dir / "db.sqlite"
+        env_path = os.environ.get("KODEKLIP_DB_PATH") or None
+        if env_path is None:
+            default_path = Path.home() / ".kodeklip" / "db.sqlite"
         else:
-            self.db_path = Path(db_path)
-            self.kodeklip_dir = self.db_path.parent
+            default_path = Path(env_path)
+
+        self.db_path = default_path if db_path is None else Path(db_path)
+        self.kodeklip_dir = self.db_path.parent
+
+        database_url = os.environ.get("KODEKLIP_DATABASE_URL")
+        if database_url and self.db_path == default_path:
+            self.database_url = database_url
+        elif str(self.db_path).startswith("file:"):
+            separator = "&" if "?" in str(self.db_path) else "?"
+            self.database_url = f"sqlite:///{self.db_path}{separator}uri=true"
+        else:
+            self.database_url = f"sqlite:///{self.db_path}"
+
+    @property
+    def in_memory(self) -> bool:
+        """Whether the database URL points at an in-memory SQLite database."""
+        url = make_url(self.database_url)
+        if url.query.get("mode") == "memory":
+            return True
+        return url.database in (None, "", ":memory:")
 
-        self.database_url = f"sqlite:///{self.db_path}"
 
+def _set_sqlite_pragmas(dbapi_connection: Any, _connection_record: Any) -> None:
+    """Apply SQLite settings to each new DBAPI connection.
 
-# Global engine instance
+    WAL mode persists in the database file, but synchronous, foreign_keys,
+    temp_store and cache_size only last as long as the connection.
+    With WAL, synchronous=NORMAL syncs at checkpoints instead of on every
+    commit. KODEKLIP_DISABLE_FSYNC=1 turns syncing off altogether; that is
+    only safe for throwaway databases such as the test suite's.
+    """
+    synchronous = "OFF" if os.environ.get("KODEKLIP_DISABLE_FSYNC") == "1" else "NORMAL"
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA synchronous={synchronous}")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-20000")
+    cursor.close()
+
+
+# Global engine instance (the one most recently returned by get_engine), its
+# URL, and the get_engine inputs it was resolved from
 _engine: Engine | None = None
-_config: DatabaseConfig | None = None
+_engine_url: str | None = None
+_engine_key: tuple[str | None, ...] | None = None
 
+# Engines by database URL, least recently used first. Switching between
+# databases reuses their engines (and pooled connections) instead of
+# rebuilding them; engines pushed out of the cache are disposed.
+_engines: OrderedDict[str, Engine] = OrderedDict()
+_ENGINE_CACHE_SIZE = 32
 
-def get_engine(db_path: str | None = None) -> Engine:
-    """Get or create SQLite engine instance.
+# Guards the engine globals above; sessions are opened from worker threads
+# (e.g. search_all_repositories)
+_engine_lock = threading.Lock()
 
-    Args:
-        db_path: Optional custom database path
 
-    Returns:
-        SQLAlchemy engine instance
-    """
-    global _engine, _config
+def _create_engine(config: DatabaseConfig) -> Engine:
+    """Create an engine for config, with SQLite pragmas set on each connection."""
+    # Ensure kodeklip directory exists
+    config.kodeklip_dir.mkdir(parents=True, exist_ok=True)
 
-    if _engine is None or (
-        db_path is not None and _config and str(_config.db_path) != db_path
-    ):
-        _config = DatabaseConfig(db_path)
+    # An in-memory database lives only as long as its connection, so
+    # every session has to share the same one
+    pool_args = {"poolclass": StaticPool} if config.in_memory else {}
 
-        # Ensure kodeklip directory exists
-        _config.kodeklip_dir.mkdir(parents=True, exist_ok=True)
+    # Create engine with WAL mode for better concurrency
+    engine = create_engine(
+        config.database_url,
+        echo=False,  # Set to True for debugging SQL statements
+        connect_args={
+            "check_same_thread": False
+        },  # Required for SQLite with threading
+        **pool_args,
+    )
 
-        # Create engine with WAL mode for better concurrency
-        _engine = create_engine(
-            _config.database_url,
-            echo=False,  # Set to True for debugging SQL statements
-            connect_args={
-                "check_same_thread": False
-            },  # Required for SQLite with threading
-        )
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    return engine
 
-        # Enable WAL mode for better performance and concurrency
-        with _engine.connect() as connection:
-            connection.execute(text("PRAGMA journal_mode=WAL"))
-            connection.execute(
-                text("PRAGMA foreign_keys=ON")
-            )  # Enable foreign key constraints
-            connection.commit()
 
-    return _engine
+def get_engine(db_path: StrPath | None = None) -> Engine:
+    """Get or create SQLite engine instance.
 
+    Args:
+        db_path: Optional custom database path
 
-def create_db_and_tables(db_path: str | None = None) -> None:
+    Returns:
+        SQLAlchemy engine instance
+    """
+    global _engine, _engine_url, _engine_key
+
+    # Everything DatabaseConfig resolves the URL from; while it is unchanged
+    # the current engine is returned without building a new config
+    key = (
+        None if db_path is None else os.fspath(db_path),
+        os.environ.get("KODEKLIP_DB_PATH"),
+        os.environ.get("KODEKLIP_DATABASE_URL"),
+    )
+    with _engine_lock:
+        if _engine is not None and key == _engine_key:
+            return _engine
+
+        config = DatabaseConfig(db_path)
+        if _engine is None or config.database_url != _engine_url:
+            engine = _engines.pop(config.database_url, None)
+            if engine is None:
+                engine = _create_engine(config)
+            _engines[config.database_url] = engine
+            while len(_engines) > _ENGINE_CACHE_SIZE:
+                _, evicted = _engines.popitem(last=False)
+                evicted.dispose()
+            _engine, _engine_url = engine, config.database_url
+
+        _engine_key = key
+        return _engine
+
+
+def _dispose_engine(database_url: str) -> None:
+    """Dispose and forget the cached engine for database_url, if any."""
+    global _engine, _engine_url, _engine_key
+
+    with _engine_lock:
+        engine = _engines.pop(database_url, None)
+        if engine is not None:
+            engine.dispose()
+        if _engine_url == database_url:
+            _engine = _engine_url = _engine_key = None
+
+
+def create_db_and_tables(db_path: StrPath | None = None) -> None:
     """Create database and all tables.
 
     Args:
@@ -91,9 +187,15 @@ def create_db_and_tables(db_path: str | None = None) -> None:
     # Create all tables
     SQLModel.metadata.create_all(engine)
 
+    # create_all only indexes tables it creates; add indexes declared since
+    # an existing database was made
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
 
 @contextmanager
-def get_session(db_path: str | None = None) -> Generator[Session, None, None]:
+def get_session(db_path: StrPath | None = None) -> Generator[Session, None, None]:
     """Get database session context manager.
 
     Args:
@@ -120,7 +222,7 @@ def get_session(db_path: str | None = None) -> Generator[Session, None, None]:
             session.close()
 
 
-def get_database_info(db_path: str | None = None) -> dict[str, str | bool | float]:
+def get_database_info(db_path: StrPath | None = None) -> dict[str, str | bool | float]:
     """Get database information and status.
 
     Args:
@@ -146,7 +248,7 @@ def get_database_info(db_path: str | None = None) -> dict[str, str | bool | floa
     return info
 
 
-def reset_database(db_path: str | None = None) -> None:
+def reset_database(db_path: StrPath | None = None) -> None:
     """Reset database by dropping and recreating all tables.
 
     WARNING: This will delete all data!
@@ -154,15 +256,10 @@ def reset_database(db_path: str | None = None) -> None:
     Args:
         db_path: Optional custom database path
     """
-    global _engine, _config
-
     config = DatabaseConfig(db_path)
 
-    # Close existing engine if it exists
-    if _engine is not None:
-        _engine.dispose()
-        _engine = None
-        _config = None
+    # Close the database's engine so the file can be removed
+    _dispose_engine(config.database_url)
 
     # Remove database file if it exists
     if config.db_path.exists():
@@ -173,14 +270,15 @@ def reset_database(db_path: str | None = None) -> None:
 
 
 def close_engine() -> None:
-    """Close the global engine connection.
+    """Close all cached engines and their connections.
 
     This is useful for testing when we need to ensure
     database files can be replaced or moved.
     """
-    global _engine, _config
+    global _engine, _engine_url, _engine_key
 
-    if _engine is not None:
-        _engine.dispose()
-        _engine = None
-        _config = None
+    with _engine_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+        _engine = _engine_url = _engine_key = None
@@ -6,21 +6,151 @@ including cloning, updating, and removing repositories from the local cache.
 Uses GitPython for git operations and integrates with SQLModel database.
 """
 
+import functools
+import os
 import re
 import shutil
 from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 
-from git import FetchInfo, GitCommandError, InvalidGitRepositoryError, Repo
+from git import FetchInfo, Git, GitCommandError, InvalidGitRepositoryError, Repo
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn
+from sqlmodel import select
 
-from .database import DatabaseConfig, get_session
+from .database import DatabaseConfig, StrPath, get_session
 from .models import Repository
 
 
+def _clone_options() -> dict[str, Any]:
+    """
+    Extra `git clone` options taken from the environment.
+
+    Setting KODEKLIP_CLONE_FILTER (e.g. "blob:none") makes clones partial and
+    KODEKLIP_CLONE_DEPTH (a positive number of commits) makes them shallow;
+    together they keep test and CI clones cheap, though a shallow clone
+    only counts the commits it fetched. KODEKLIP_CLONE_NO_CHECKOUT=1 also
+    skips writing the working tree, for callers that never read the cloned
+    files. KODEKLIP_CLONE_REFERENCE names a local repository whose objects
+    clones borrow through git's alternates instead of copying them (ignored
+    if it is missing or shallow). Unset, clones are full.
+
+    Returns:
+        Keyword arguments for Repo.clone_from
+    """
+    options: dict[str, Any] = {}
+    clone_filter = os.environ.get("KODEKLIP_CLONE_FILTER")
+    if clone_filter:
+        options["filter"] = clone_filter
+    depth = os.environ.get("KODEKLIP_CLONE_DEPTH", "")
+    if depth.isdigit() and int(depth) > 0:
+        options["depth"] = int(depth)
+    if os.environ.get("KODEKLIP_CLONE_NO_CHECKOUT") == "1":
+        options["no_checkout"] = True
+    reference = os.environ.get("KODEKLIP_CLONE_REFERENCE")
+    if reference:
+        options["reference_if_able"] = reference
+    return options
+
+
+@functools.lru_cache(maxsize=128)
+def _commit_count(local_path: str, head_sha: str) -> int:
+    """
+    Count the commits reachable from head_sha with one `git rev-list --count`.
+
+    A commit's history never changes, so results are cached per repository
+    and commit; a new HEAD is a new cache key.
+
+    Returns:
+        Number of commits reachable from head_sha
+    """
+    return int(Git(local_path).rev_list("--count", head_sha))
+
+
+def _directory_size(path: Path) -> int:
+    """
+    Total size in bytes of the regular files under path.
+
+    Walks with os.scandir, whose entries carry their file type, so only files
+    are stat'ed. Symlinks are not followed.
+
+    Returns:
+        Sum of file sizes in bytes
+    """
+    total = 0
+    pending = [os.fspath(path)]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    total += entry.stat(follow_symlinks=False).st_size
+    return total
+
+
+# Threads used to delete orphaned clones in parallel
+_REMOVAL_WORKERS = 4
+
+
+def _remove_directory(path: Path) -> float:
+    """
+    Delete a directory tree, measuring it first.
+
+    Returns:
+        Size of the removed tree in MB
+    """
+    size_mb = _directory_size(path) / (1024 * 1024)
+    shutil.rmtree(path)
+    return size_mb
+
+
+# Supported git URL patterns, compiled once
+_REPOSITORY_URL_PATTERNS = [
+    re.compile(pattern)
+    for pattern in (
+        # GitHub patterns
+        r"^https://github\.com/[\w\-\.]+/[\w\-\.]+(?:\.git)?/?$",
+        r"^git@github\.com:[\w\-\.]+/[\w\-\.]+(?:\.git)?$",
+        # GitLab patterns
+        r"^https://gitlab\.com/[\w\-\.]+/[\w\-\.]+(?:\.git)?/?$",
+        r"^git@gitlab\.com:[\w\-\.]+/[\w\-\.]+(?:\.git)?$",
+        # Bitbucket patterns
+        r"^https://bitbucket\.org/[\w\-\.]+/[\w\-\.]+(?:\.git)?/?$",
+        r"^git@bitbucket\.org:[\w\-\.]+/[\w\-\.]+(?:\.git)?$",
+        # Generic git patterns
+        r"^https?://[^/]+/.*\.git/?$",
+        r"^git@[^:]+:.*\.git$",
+        r"^ssh://git@[^/]+/.*\.git$",
+        # Local repositories (e.g. mirrors)
+        r"^file:///.*\.git/?$",
+    )
+]
+
+
+def validate_repository_url(url: str) -> bool:
+    """
+    Validate if URL is a supported git repository URL.
+
+    Supports GitHub, GitLab, Bitbucket, generic git URLs, and local
+    file:// repositories.
+
+    Args:
+        url: Repository URL to validate
+
+    Returns:
+        True if URL is valid, False otherwise
+    """
+    if not url or not isinstance(url, str):
+        return False
+
+    url = url.strip()
+    return any(pattern.match(url) for pattern in _REPOSITORY_URL_PATTERNS)
+
+
 class GitRepository:
     """
     Git repository management class for KodeKlip.
@@ -29,7 +159,7 @@ class GitRepository:
     Integrates with the database to track repository metadata and status.
     """
 
-    def __init__(self, db_path: str | None = None):
+    def __init__(self, db_path: StrPath | None = None):
         """
         Initialize GitRepository manager.
 
@@ -47,7 +177,7 @@ class GitRepository:
         """
         Validate if URL is a supported git repository URL.
 
-        Supports GitHub, GitLab, Bitbucket, and generic git URLs.
+        See the module-level validate_repository_url.
 
         Args:
             url: Repository URL to validate
@@ -55,27 +185,7 @@ class GitRepository:
         Returns:
             True if URL is valid, False otherwise
         """
-        if not url or not isinstance(url, str):
-            return False
-
-        # Common git URL patterns
-        patterns = [
-            # GitHub patterns
-            r"^https://github\.com/[\w\-\.]+/[\w\-\.]+(?:\.git)?/?$",
-            r"^git@github\.com:[\w\-\.]+/[\w\-\.]+(?:\.git)?$",
-            # GitLab patterns
-            r"^https://gitlab\.com/[\w\-\.]+/[\w\-\.]+(?:\.git)?/?$",
-            r"^git@gitlab\.com:[\w\-\.]+/[\w\-\.]+(?:\.git)?$",
-            # Bitbucket patterns
-            r"^https://bitbucket\.org/[\w\-\.]+/[\w\-\.]+(?:\.git)?/?$",
-            r"^git@bitbucket\.org:[\w\-\.]+/[\w\-\.]+(?:\.git)?$",
-            # Generic git patterns
-            r"^https?://[^/]+/.*\.git/?$",
-            r"^git@[^:]+:.*\.git$",
-            r"^ssh://git@[^/]+/.*\.git$",
-        ]
-
-        return any(re.match(pattern, url.strip()) for pattern in patterns)
+        return validate_repository_url(url)
 
     def _get_local_path(self, alias: str) -> Path:
         """
@@ -118,9 +228,7 @@ class GitRepository:
             return False, f"Repository with alias '{alias}' already exists", None
 
         # Check if alias already exists in database
-        with get_session(str(self.config.db_path)) as session:
-            from sqlmodel import select
-
+        with get_session(self.config.db_path) as session:
             existing_repo = session.exec(
                 select(Repository).where(Repository.alias == alias)
             ).first()
@@ -142,7 +250,9 @@ class GitRepository:
                 task = progress.add_task(f"Cloning {alias}...", total=None)
 
                 # Clone the repository
-                _ = Repo.clone_from(url, local_path, progress=progress_callback)
+                _ = Repo.clone_from(
+                    url, local_path, progress=progress_callback, **_clone_options()
+                )
 
                 progress.update(task, description=f"Cloned {alias} successfully")
 
@@ -155,13 +265,15 @@ class GitRepository:
                 )
 
             # Create database record
-            with get_session(str(self.config.db_path)) as session:
+            with get_session(self.config.db_path) as session:
                 db_repo = Repository(
                     alias=alias, url=url, local_path=str(local_path), indexed=False
                 )
+                # Keep the loaded attributes after commit instead of
+                # re-selecting the row; the INSERT already set the primary key
+                session.expire_on_commit = False
                 session.add(db_repo)
                 session.commit()
-                session.refresh(db_repo)
 
                 return True, f"Successfully cloned {alias} to {local_path}", db_repo
 
@@ -204,9 +316,7 @@ class GitRepository:
             return False
 
         # Check database
-        with get_session(str(self.config.db_path)) as session:
-            from sqlmodel import select
-
+        with get_session(self.config.db_path) as session:
             repo = session.exec(
                 select(Repository).where(Repository.alias == alias)
             ).first()
@@ -222,9 +332,7 @@ class GitRepository:
         Returns:
             Repository record or None if not found
         """
-        with get_session(str(self.config.db_path)) as session:
-            from sqlmodel import select
-
+        with get_session(self.config.db_path) as session:
             return session.exec(
                 select(Repository).where(Repository.alias == alias)
             ).first()
@@ -236,9 +344,7 @@ class GitRepository:
         Returns:
             List of Repository records
         """
-        with get_session(str(self.config.db_path)) as session:
-            from sqlmodel import select
-
+        with get_session(self.config.db_path) as session:
             return list(session.exec(select(Repository)).all())
 
     def update_repository(
@@ -298,9 +404,7 @@ class GitRepository:
                     message = f"Repository {alias} is already up to date"
 
             # Update database record with timestamp
-            with get_session(str(self.config.db_path)) as session:
-                from sqlmodel import select
-
+            with get_session(self.config.db_path) as session:
                 repo_record = session.exec(
                     select(Repository).where(Repository.alias == alias)
                 ).first()
@@ -400,6 +504,9 @@ class GitRepository:
 
         try:
             repo = Repo(local_path)
+            # One `git status` run for both fields below;
+            # is_dirty(untracked_files=True) would list them again
+            untracked_files = repo.untracked_files
 
             # Basic repository info
             status.update(
@@ -409,9 +516,11 @@ class GitRepository:
                     "exists": True,
                     "is_git_repo": True,
                     "current_branch": repo.active_branch.name,
-                    "total_commits": len(list(repo.iter_commits())),
-                    "is_dirty": repo.is_dirty(untracked_files=True),
-                    "untracked_files": len(repo.untracked_files),
+                    "total_commits": _commit_count(
+                        str(local_path), repo.head.commit.hexsha
+                    ),
+                    "is_dirty": bool(untracked_files) or repo.is_dirty(),
+                    "untracked_files": len(untracked_files),
                     "has_remote": len(repo.remotes) > 0,
                 }
             )
@@ -427,9 +536,7 @@ class GitRepository:
                 )
 
             # Get database info
-            with get_session(str(self.config.db_path)) as session:
-                from sqlmodel import select
-
+            with get_session(self.config.db_path) as session:
                 repo_record = session.exec(
                     select(Repository).where(Repository.alias == alias)
                 ).first()
@@ -473,9 +580,7 @@ class GitRepository:
             Tuple of (success, message)
         """
         # Check if repository exists in database
-        with get_session(str(self.config.db_path)) as session:
-            from sqlmodel import select
-
+        with get_session(self.config.db_path) as session:
             repo_record = session.exec(
                 select(Repository).where(Repository.alias == alias)
             ).first()
@@ -533,9 +638,7 @@ class GitRepository:
 
         try:
             # Get all aliases from database
-            with get_session(str(self.config.db_path)) as session:
-                from sqlmodel import select
-
+            with get_session(self.config.db_path) as session:
                 db_aliases = {
                     repo.alias for repo in session.exec(select(Repository)).all()
                 }
@@ -544,29 +647,31 @@ class GitRepository:
             if not self.repos_dir.exists():
                 return True, "No repositories directory found", cleanup_info
 
-            for local_dir in self.repos_dir.iterdir():
-                if local_dir.is_dir() and local_dir.name not in db_aliases:
-                    cleanup_info["orphaned_dirs"].append(local_dir.name)
-
-                    try:
-                        # Calculate directory size before removal
-                        total_size = sum(
-                            f.stat().st_size
-                            for f in local_dir.rglob("*")
-                            if f.is_file()
-                        )
-                        size_mb = total_size / (1024 * 1024)
-
-                        # Remove directory
-                        shutil.rmtree(local_dir)
-
-                        cleanup_info["removed_dirs"].append(local_dir.name)
-                        cleanup_info["space_freed_mb"] += size_mb
-
-                    except Exception as e:
-                        cleanup_info["failed_removals"].append(
-                            {"directory": local_dir.name, "error": str(e)}
-                        )
+            orphaned = [
+                local_dir
+                for local_dir in self.repos_dir.iterdir()
+                if local_dir.is_dir() and local_dir.name not in db_aliases
+            ]
+            cleanup_info["orphaned_dirs"] = [local_dir.name for local_dir in orphaned]
+
+            # Orphans are independent trees: remove them concurrently. rmtree
+            # spends its time in unlink calls, which release the GIL.
+            with ThreadPoolExecutor(max_workers=_REMOVAL_WORKERS) as executor:
+                removals = [
+                    (local_dir.name, executor.submit(_remove_directory, local_dir))
+                    for local_dir in orphaned
+                ]
+
+            for name, removal in removals:
+                try:
+                    size_mb = removal.result()
+                except Exception as e:
+                    cleanup_info["failed_removals"].append(
+                        {"directory": name, "error": str(e)}
+                    )
+                else:
+                    cleanup_info["removed_dirs"].append(name)
+                    cleanup_info["space_freed_mb"] += size_mb
 
             if cleanup_info["orphaned_dirs"]:
                 message = f"Cleaned up {len(cleanup_info['removed_dirs'])} orphaned directories, freed {cleanup_info['space_freed_mb']:.2f} MB"
@@ -595,9 +700,7 @@ class GitRepository:
         }
 
         try:
-            with get_session(str(self.config.db_path)) as session:
-                from sqlmodel import select
-
+            with get_session(self.config.db_path) as session:
                 repositories = list(session.exec(select(Repository)).all())
 
                 for repo in repositories:
@@ -661,9 +764,7 @@ class GitRepository:
         }
 
         try:
-            with get_session(str(self.config.db_path)) as session:
-                from sqlmodel import select
-
+            with get_session(self.config.db_path) as session:
                 repositories = list(session.exec(select(Repository)).all())
 
             usage_info["total_repos"] = len(repositories)
@@ -674,12 +775,7 @@ class GitRepository:
                 if local_path.exists():
                     try:
                         # Calculate directory size
-                        total_size = sum(
-                            f.stat().st_size
-                            for f in local_path.rglob("*")
-                            if f.is_file()
-                        )
-                        size_mb = total_size / (1024 * 1024)
+                        size_mb = _directory_size(local_path) / (1024 * 1024)
 
                         usage_info["repo_sizes"][repo.alias] = size_mb
                         usage_info["total_size_mb"] += size_mb
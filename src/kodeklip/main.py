@@ -7,6 +7,7 @@ This module defines the command-line interface using Typer.
 from datetime import datetime
 from typing import List, Optional
 
+import orjson
 import typer
 from rich import print as rprint
 from rich.console import Console
@@ -221,7 +222,6 @@ def list(
             return
 
         if json_output:
-            import json
             repo_data = []
             for repo in repositories:
                 repo_data.append({
@@ -231,7 +231,7 @@ def list(
                     "last_updated": repo.last_updated.isoformat() if repo.last_updated else None,
                     "indexed": repo.indexed
                 })
-            print(json.dumps(repo_data, indent=2))
+            print(orjson.dumps(repo_data, option=orjson.OPT_INDENT_2).decode())
             return
 
         console.print("[yellow]📋 Repository Knowledge Base[/yellow]")
@@ -467,19 +467,19 @@ def find(
 
     try:
         # Initialize searcher
-        searcher = RipgrepSearcher()
+        searcher = RipgrepSearcher(persist_cache=True)
 
         # Create search options
         options = SearchOptions(
-            file_types=[file_type] if file_type else [],
+            file_types=(file_type,) if file_type else (),
             context_before=context,
             context_after=context,
             ignore_case=not case_sensitive,
             smart_case=not case_sensitive,
             regex_mode=regex,
             max_results=limit,
-            exclude_patterns=exclude or [],
-            include_patterns=include or []
+            exclude_patterns=tuple(exclude or ()),
+            include_patterns=tuple(include or ())
         )
 
         # Display search configuration
@@ -516,7 +516,6 @@ def find(
 
         # Handle JSON output
         if json_output:
-            import json
             json_data = {
                 "query": query,
                 "repository": alias,
@@ -524,7 +523,7 @@ def find(
                 "results": [result.to_dict() for result in results]
             }
 
-            json_str = json.dumps(json_data, indent=2)
+            json_str = orjson.dumps(json_data, option=orjson.OPT_INDENT_2).decode()
 
             if output_file:
                 try:
@@ -569,11 +568,13 @@ def find(
             # Generate output content
             if detailed:
                 # Show detailed results with syntax highlighting
-                panels = searcher.formatter.format_results_detailed(display_results, query)
                 if output_file:
                     # For file output, format as plain text
                     output_content = _format_detailed_results_for_file(display_results, query, alias)
                 else:
+                    panels = searcher.formatter.format_results_detailed(
+                        display_results, query
+                    )
                     for panel in panels:
                         console.print(panel)
                         console.print()
@@ -50,7 +50,9 @@ class SearchIndex(SQLModel, table=True):
 
     id: int | None = Field(default=None, primary_key=True)
     repo_id: int = Field(
-        foreign_key="repository.id", description="Reference to parent repository"
+        index=True,
+        foreign_key="repository.id",
+        description="Reference to parent repository",
     )
     file_path: str = Field(
         index=True, description="Relative path to file within repository"
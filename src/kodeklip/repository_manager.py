@@ -5,11 +5,15 @@ This module provides high-level functions for managing repositories in the datab
 including adding, retrieving, updating, and removing repository records.
 """
 
-from datetime import datetime
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from datetime import datetime, timezone
 
-from sqlmodel import select
+from sqlalchemy import bindparam
+from sqlmodel import Session, col, delete, func, select
 
-from .database import get_session
+from .database import StrPath, get_session
 from .models import Repository, SearchIndex
 
 
@@ -31,8 +35,49 @@ class RepositoryAlreadyExistsError(RepositoryError):
     pass
 
 
+# Statements used on every call, built once. SQLAlchemy caches their compiled
+# SQL too; values are passed as bound parameters at execution time.
+_REPOSITORY_BY_ALIAS = select(Repository).where(
+    Repository.alias == bindparam("alias")
+)
+_REPOSITORY_ID_BY_ALIAS = select(Repository.id).where(
+    Repository.alias == bindparam("alias")
+)
+_REPOSITORIES_BY_ALIAS = select(Repository).order_by(Repository.alias)
+_REPOSITORY_COUNT = select(func.count()).select_from(Repository)
+_SEARCH_INDEX_COUNT = (
+    select(func.count())
+    .select_from(SearchIndex)
+    .where(SearchIndex.repo_id == bindparam("repo_id"))
+)
+
+
+@contextmanager
+def _session_scope(
+    session: Session | None, db_path: StrPath | None
+) -> Iterator[Session]:
+    """Yield the caller's session, or open a new one on db_path."""
+    if session is not None:
+        yield session
+    else:
+        with get_session(db_path) as own_session:
+            yield own_session
+
+
+def _finish(session: Session, owned: bool) -> None:
+    """Commit a session we opened; only flush one the caller owns."""
+    if owned:
+        session.commit()
+    else:
+        session.flush()
+
+
 def add_repository(
-    alias: str, url: str, local_path: str, db_path: str | None = None
+    alias: str,
+    url: str,
+    local_path: str,
+    db_path: StrPath | None = None,
+    session: Session | None = None,
 ) -> Repository:
     """Add a new repository to the database.
 
@@ -41,6 +86,8 @@ def add_repository(
         url: Git repository URL
         local_path: Local filesystem path where repository is cloned
         db_path: Optional custom database path
+        session: Optional session to work in instead of opening one; the
+            changes are flushed and left for the caller to commit
 
     Returns:
         Created Repository instance
@@ -50,10 +97,11 @@ def add_repository(
         RepositoryError: If database operation fails
     """
     try:
-        with get_session(db_path) as session:
+        with _session_scope(session, db_path) as db_session:
             # Check if repository already exists
-            statement = select(Repository).where(Repository.alias == alias)
-            existing = session.exec(statement).first()
+            existing = db_session.exec(
+                _REPOSITORY_BY_ALIAS, params={"alias": alias}
+            ).first()
 
             if existing is not None:
                 raise RepositoryAlreadyExistsError(
@@ -69,9 +117,12 @@ def add_repository(
                 indexed=False,
             )
 
-            session.add(repository)
-            session.commit()
-            session.refresh(repository)
+            # Keep loaded attributes after commit; the primary key is populated
+            # from the INSERT itself, so no follow-up SELECT is needed
+            if session is None:
+                db_session.expire_on_commit = False
+            db_session.add(repository)
+            _finish(db_session, owned=session is None)
 
             return repository
 
@@ -81,7 +132,64 @@ def add_repository(
         raise RepositoryError(f"Failed to add repository '{alias}': {str(e)}") from e
 
 
-def get_repository(alias: str, db_path: str | None = None) -> Repository:
+def add_repositories(
+    repositories: Iterable[tuple[str, str, str]], db_path: StrPath | None = None
+) -> list[Repository]:
+    """Add several repositories in a single transaction.
+
+    Prefer this over calling add_repository in a loop, which opens a
+    session and commits once per repository. Either all repositories are
+    added or none are.
+
+    Args:
+        repositories: (alias, url, local_path) tuples
+        db_path: Optional custom database path
+
+    Returns:
+        Created Repository instances, in input order
+
+    Raises:
+        RepositoryAlreadyExistsError: If an alias already exists or is repeated
+        RepositoryError: If database operation fails
+    """
+    new_repositories = [
+        Repository(alias=alias, url=url, local_path=local_path, indexed=False)
+        for alias, url, local_path in repositories
+    ]
+    if not new_repositories:
+        return []
+
+    aliases = [repository.alias for repository in new_repositories]
+    repeated = sorted(alias for alias, n in Counter(aliases).items() if n > 1)
+    if repeated:
+        raise RepositoryAlreadyExistsError(
+            f"Repository aliases given more than once: {', '.join(repeated)}"
+        )
+
+    try:
+        with get_session(db_path) as session:
+            statement = select(Repository.alias).where(
+                col(Repository.alias).in_(aliases)
+            )
+            existing = sorted(session.exec(statement).all())
+            if existing:
+                raise RepositoryAlreadyExistsError(
+                    f"Repositories already exist: {', '.join(existing)}"
+                )
+
+            session.expire_on_commit = False
+            session.add_all(new_repositories)
+            session.commit()
+
+            return new_repositories
+
+    except RepositoryAlreadyExistsError:
+        raise
+    except Exception as e:
+        raise RepositoryError(f"Failed to add repositories: {str(e)}") from e
+
+
+def get_repository(alias: str, db_path: StrPath | None = None) -> Repository:
     """Get repository by alias.
 
     Args:
@@ -97,8 +205,9 @@ def get_repository(alias: str, db_path: str | None = None) -> Repository:
     """
     try:
         with get_session(db_path) as session:
-            statement = select(Repository).where(Repository.alias == alias)
-            repository = session.exec(statement).first()
+            repository = session.exec(
+                _REPOSITORY_BY_ALIAS, params={"alias": alias}
+            ).first()
 
             if repository is None:
                 raise RepositoryNotFoundError(
@@ -113,7 +222,7 @@ def get_repository(alias: str, db_path: str | None = None) -> Repository:
         raise RepositoryError(f"Failed to get repository '{alias}': {str(e)}") from e
 
 
-def list_repositories(db_path: str | None = None) -> list[Repository]:
+def list_repositories(db_path: StrPath | None = None) -> list[Repository]:
     """List all repositories.
 
     Args:
@@ -127,8 +236,7 @@ def list_repositories(db_path: str | None = None) -> list[Repository]:
     """
     try:
         with get_session(db_path) as session:
-            statement = select(Repository).order_by(Repository.alias)
-            repositories = session.exec(statement).all()
+            repositories = session.exec(_REPOSITORIES_BY_ALIAS).all()
             return list(repositories)
 
     except Exception as e:
@@ -139,13 +247,14 @@ def update_repository_status(
     alias: str,
     last_updated: datetime | None = None,
     indexed: bool | None = None,
-    db_path: str | None = None,
+    db_path: StrPath | None = None,
 ) -> Repository:
     """Update repository status information.
 
     Args:
         alias: Repository alias to update
-        last_updated: Optional new last_updated timestamp
+        last_updated: Optional new last_updated timestamp; timezone-aware
+            values are converted to naive UTC, the form stored in the database
         indexed: Optional new indexed status
         db_path: Optional custom database path
 
@@ -158,8 +267,9 @@ def update_repository_status(
     """
     try:
         with get_session(db_path) as session:
-            statement = select(Repository).where(Repository.alias == alias)
-            repository = session.exec(statement).first()
+            repository = session.exec(
+                _REPOSITORY_BY_ALIAS, params={"alias": alias}
+            ).first()
 
             if repository is None:
                 raise RepositoryNotFoundError(
@@ -168,14 +278,19 @@ def update_repository_status(
 
             # Update fields if provided
             if last_updated is not None:
+                if last_updated.tzinfo is not None:
+                    last_updated = last_updated.astimezone(timezone.utc).replace(
+                        tzinfo=None
+                    )
                 repository.last_updated = last_updated
 
             if indexed is not None:
                 repository.indexed = indexed
 
+            # Values written above are already current on the instance
+            session.expire_on_commit = False
             session.add(repository)
             session.commit()
-            session.refresh(repository)
 
             return repository
 
@@ -185,12 +300,16 @@ def update_repository_status(
         raise RepositoryError(f"Failed to update repository '{alias}': {str(e)}") from e
 
 
-def remove_repository(alias: str, db_path: str | None = None) -> bool:
+def remove_repository(
+    alias: str, db_path: StrPath | None = None, session: Session | None = None
+) -> bool:
     """Remove repository and all associated search indexes.
 
     Args:
         alias: Repository alias to remove
         db_path: Optional custom database path
+        session: Optional session to work in instead of opening one; the
+            changes are flushed and left for the caller to commit
 
     Returns:
         True if repository was removed, False if it didn't exist
@@ -199,26 +318,24 @@ def remove_repository(alias: str, db_path: str | None = None) -> bool:
         RepositoryError: If database operation fails
     """
     try:
-        with get_session(db_path) as session:
+        with _session_scope(session, db_path) as db_session:
             # Get repository
-            statement = select(Repository).where(Repository.alias == alias)
-            repository = session.exec(statement).first()
+            repository = db_session.exec(
+                _REPOSITORY_BY_ALIAS, params={"alias": alias}
+            ).first()
 
             if repository is None:
                 return False
 
-            # Remove all associated search indexes first (due to foreign key constraint)
-            search_index_statement = select(SearchIndex).where(
-                SearchIndex.repo_id == repository.id
+            # Remove all associated search indexes first (due to foreign key
+            # constraint), in one DELETE rather than loading and deleting rows
+            db_session.exec(
+                delete(SearchIndex).where(col(SearchIndex.repo_id) == repository.id)
             )
-            search_indexes = session.exec(search_index_statement).all()
-
-            for search_index in search_indexes:
-                session.delete(search_index)
 
             # Remove repository
-            session.delete(repository)
-            session.commit()
+            db_session.delete(repository)
+            _finish(db_session, owned=session is None)
 
             return True
 
@@ -226,7 +343,7 @@ def remove_repository(alias: str, db_path: str | None = None) -> bool:
         raise RepositoryError(f"Failed to remove repository '{alias}': {str(e)}") from e
 
 
-def repository_exists(alias: str, db_path: str | None = None) -> bool:
+def repository_exists(alias: str, db_path: StrPath | None = None) -> bool:
     """Check if repository exists.
 
     Args:
@@ -241,9 +358,10 @@ def repository_exists(alias: str, db_path: str | None = None) -> bool:
     """
     try:
         with get_session(db_path) as session:
-            statement = select(Repository).where(Repository.alias == alias)
-            repository = session.exec(statement).first()
-            return repository is not None
+            repository_id = session.exec(
+                _REPOSITORY_ID_BY_ALIAS, params={"alias": alias}
+            ).first()
+            return repository_id is not None
 
     except Exception as e:
         raise RepositoryError(
@@ -251,7 +369,42 @@ def repository_exists(alias: str, db_path: str | None = None) -> bool:
         ) from e
 
 
-def get_repository_count(db_path: str | None = None) -> int:
+def repositories_exist(
+    aliases: Iterable[str], db_path: StrPath | None = None
+) -> dict[str, bool]:
+    """Check existence of several repositories with a single query.
+
+    Prefer this over calling repository_exists in a loop, which opens a
+    session and issues one query per alias.
+
+    Args:
+        aliases: Repository aliases to check
+        db_path: Optional custom database path
+
+    Returns:
+        Dictionary mapping each alias to whether it exists
+
+    Raises:
+        RepositoryError: If database operation fails
+    """
+    unique_aliases = list(dict.fromkeys(aliases))
+    if not unique_aliases:
+        return {}
+
+    try:
+        with get_session(db_path) as session:
+            statement = select(Repository.alias).where(
+                col(Repository.alias).in_(unique_aliases)
+            )
+            found = set(session.exec(statement).all())
+
+        return {alias: alias in found for alias in unique_aliases}
+
+    except Exception as e:
+        raise RepositoryError(f"Failed to check repositories exist: {str(e)}") from e
+
+
+def get_repository_count(db_path: StrPath | None = None) -> int:
     """Get total count of repositories.
 
     Args:
@@ -265,20 +418,21 @@ def get_repository_count(db_path: str | None = None) -> int:
     """
     try:
         with get_session(db_path) as session:
-            statement = select(Repository)
-            repositories = session.exec(statement).all()
-            return len(list(repositories))
+            return session.exec(_REPOSITORY_COUNT).one()
 
     except Exception as e:
         raise RepositoryError(f"Failed to get repository count: {str(e)}") from e
 
 
-def get_repository_info(alias: str, db_path: str | None = None) -> dict:
+def get_repository_info(
+    alias: str, db_path: StrPath | None = None, session: Session | None = None
+) -> dict:
     """Get detailed repository information including search index count.
 
     Args:
         alias: Repository alias
         db_path: Optional custom database path
+        session: Optional session to query in instead of opening one
 
     Returns:
         Dictionary with repository information
@@ -288,22 +442,21 @@ def get_repository_info(alias: str, db_path: str | None = None) -> dict:
         RepositoryError: If database operation fails
     """
     try:
-        with get_session(db_path) as session:
+        with _session_scope(session, db_path) as db_session:
             # Get repository
-            repo_statement = select(Repository).where(Repository.alias == alias)
-            repository = session.exec(repo_statement).first()
+            repository = db_session.exec(
+                _REPOSITORY_BY_ALIAS, params={"alias": alias}
+            ).first()
 
             if repository is None:
                 raise RepositoryNotFoundError(
                     f"Repository with alias '{alias}' not found"
                 )
 
-            # Get search index count
-            index_statement = select(SearchIndex).where(
-                SearchIndex.repo_id == repository.id
-            )
-            search_indexes = session.exec(index_statement).all()
-            index_count = len(list(search_indexes))
+            # Get search index count without loading the rows
+            index_count = db_session.exec(
+                _SEARCH_INDEX_COUNT, params={"repo_id": repository.id}
+            ).one()
 
             return {
                 "id": repository.id,
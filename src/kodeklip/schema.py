@@ -5,13 +5,14 @@ This module provides utilities for validating database schema integrity,
 checking for data corruption, and preparing for future schema migrations.
 """
 
-import shutil
+import sqlite3
+from contextlib import closing
 from datetime import datetime
 from pathlib import Path
 
 from sqlmodel import text
 
-from .database import DatabaseConfig, close_engine, get_session
+from .database import DatabaseConfig, StrPath, get_session
 
 # Current schema version - increment when making schema changes
 SCHEMA_VERSION = 1
@@ -35,7 +36,7 @@ class SchemaMigrationError(SchemaError):
     pass
 
 
-def get_schema_version(db_path: str | None = None) -> int:
+def get_schema_version(db_path: StrPath | None = None) -> int:
     """Get current database schema version.
 
     Args:
@@ -73,7 +74,7 @@ def get_schema_version(db_path: str | None = None) -> int:
         raise SchemaError(f"Failed to get schema version: {str(e)}") from e
 
 
-def set_schema_version(version: int, db_path: str | None = None) -> None:
+def set_schema_version(version: int, db_path: StrPath | None = None) -> None:
     """Set database schema version.
 
     Args:
@@ -110,7 +111,7 @@ def set_schema_version(version: int, db_path: str | None = None) -> None:
         raise SchemaError(f"Failed to set schema version: {str(e)}") from e
 
 
-def validate_schema(db_path: str | None = None) -> dict[str, bool | str | int]:
+def validate_schema(db_path: StrPath | None = None) -> dict[str, bool | str | int]:
     """Validate database schema integrity.
 
     Args:
@@ -124,8 +125,9 @@ def validate_schema(db_path: str | None = None) -> dict[str, bool | str | int]:
     """
     try:
         config = DatabaseConfig(db_path)
+        database_exists = config.db_path.is_file()
         validation_results: dict[str, bool | str | int] = {
-            "database_exists": config.db_path.exists(),
+            "database_exists": database_exists,
             "schema_version": 0,
             "tables_exist": False,
             "foreign_keys_enabled": False,
@@ -133,26 +135,26 @@ def validate_schema(db_path: str | None = None) -> dict[str, bool | str | int]:
             "data_integrity": False,
         }
 
-        if not config.db_path.exists():
+        # Don't open a connection on a missing file: SQLite would create it
+        if not database_exists:
             return validation_results
 
         with get_session(db_path) as session:
             # Check schema version
             validation_results["schema_version"] = get_schema_version(db_path)
 
-            # Check if required tables exist
+            # Check if required tables exist, in one query
             required_tables = ["repository", "searchindex"]
-            existing_tables = []
-
-            for table in required_tables:
-                result = session.exec(
+            found_tables = {
+                row[0]
+                for row in session.exec(
                     text(
                         "SELECT name FROM sqlite_master WHERE type='table' "
-                        "AND name=:table"
-                    ).params(table=table)
-                ).first()
-                if result:
-                    existing_tables.append(table)
+                        "AND name IN ('repository', 'searchindex')"
+                    )
+                ).all()
+            }
+            existing_tables = [t for t in required_tables if t in found_tables]
 
             validation_results["tables_exist"] = len(existing_tables) == len(
                 required_tables
@@ -165,23 +167,24 @@ def validate_schema(db_path: str | None = None) -> dict[str, bool | str | int]:
                 bool(fk_result[0]) if fk_result else False
             )
 
-            # Check indexes
+            # Check indexes (one is enough)
             index_result = session.exec(
                 text(
-                    "SELECT name FROM sqlite_master WHERE type='index' "
-                    "AND name NOT LIKE 'sqlite_%'"
+                    "SELECT 1 FROM sqlite_master WHERE type='index' "
+                    "AND name NOT LIKE 'sqlite_%' LIMIT 1"
                 )
-            ).all()
-            validation_results["indexes_exist"] = len(list(index_result)) > 0
+            ).first()
+            validation_results["indexes_exist"] = index_result is not None
 
             # Basic data integrity check
             if validation_results["tables_exist"]:
-                # Check for orphaned search indexes
+                # Check for orphaned search indexes (anti-join on repo_id)
                 orphan_result = session.exec(
                     text(
                         """
-                    SELECT COUNT(*) FROM searchindex
-                    WHERE repo_id NOT IN (SELECT id FROM repository)
+                    SELECT COUNT(*) FROM searchindex s
+                    LEFT JOIN repository r ON r.id = s.repo_id
+                    WHERE r.id IS NULL
                 """
                     )
                 ).first()
@@ -198,7 +201,18 @@ def validate_schema(db_path: str | None = None) -> dict[str, bool | str | int]:
         raise SchemaValidationError(f"Schema validation failed: {str(e)}") from e
 
 
-def create_backup(db_path: str | None = None, backup_dir: str | None = None) -> str:
+def _copy_database(source: Path, destination: Path) -> None:
+    """Copy an SQLite database page by page with the online backup API."""
+    with (
+        closing(sqlite3.connect(source)) as src,
+        closing(sqlite3.connect(destination)) as dst,
+    ):
+        src.backup(dst)
+
+
+def create_backup(
+    db_path: StrPath | None = None, backup_dir: StrPath | None = None
+) -> str:
     """Create a backup of the database.
 
     Args:
@@ -230,11 +244,9 @@ def create_backup(db_path: str | None = None, backup_dir: str | None = None) ->
         backup_filename = f"db_backup_{timestamp}.sqlite"
         backup_path = backup_dir_path / backup_filename
 
-        # Close any database connections to ensure file is not locked
-        close_engine()
-
-        # Copy database file
-        shutil.copy2(config.db_path, backup_path)
+        # Copy with SQLite's online backup API: unlike a file copy it includes
+        # committed pages still in the WAL and works while connections are open
+        _copy_database(config.db_path, backup_path)
 
         # Verify backup
         if not backup_path.exists():
@@ -246,7 +258,7 @@ def create_backup(db_path: str | None = None, backup_dir: str | None = None) ->
         raise SchemaError(f"Failed to create backup: {str(e)}") from e
 
 
-def restore_backup(backup_path: str, db_path: str | None = None) -> None:
+def restore_backup(backup_path: str, db_path: StrPath | None = None) -> None:
     """Restore database from backup.
 
     WARNING: This will overwrite the current database!
@@ -268,11 +280,9 @@ def restore_backup(backup_path: str, db_path: str | None = None) -> None:
         # Ensure target directory exists
         config.kodeklip_dir.mkdir(parents=True, exist_ok=True)
 
-        # Close any existing database connections
-        close_engine()
-
-        # Copy backup to database location
-        shutil.copy2(backup_file, config.db_path)
+        # Copy backup into the database through SQLite, so a stale WAL file
+        # next to the database can't be replayed over the restored pages
+        _copy_database(backup_file, config.db_path)
 
         # Verify restore
         if not config.db_path.exists():
@@ -287,7 +297,7 @@ def restore_backup(backup_path: str, db_path: str | None = None) -> None:
         raise SchemaError(f"Failed to restore backup: {str(e)}") from e
 
 
-def check_migration_needed(db_path: str | None = None) -> tuple[bool, int, int]:
+def check_migration_needed(db_path: StrPath | None = None) -> tuple[bool, int, int]:
     """Check if database migration is needed.
 
     Args:
@@ -311,7 +321,7 @@ def check_migration_needed(db_path: str | None = None) -> tuple[bool, int, int]:
         raise SchemaError(f"Failed to check migration status: {str(e)}") from e
 
 
-def get_database_statistics(db_path: str | None = None) -> dict[str, int | float]:
+def get_database_statistics(db_path: StrPath | None = None) -> dict[str, int | float]:
     """Get database statistics and health information.
 
     Args:
@@ -363,7 +373,7 @@ def get_database_statistics(db_path: str | None = None) -> dict[str, int | float
 
 
 def repair_database(
-    db_path: str | None = None, make_backup: bool = True
+    db_path: StrPath | None = None, make_backup: bool = True
 ) -> dict[str, bool | int]:
     """Attempt to repair common database issues.
 
@@ -399,12 +409,16 @@ def repair_database(
             session.exec(text("PRAGMA foreign_keys=ON"))  # type: ignore[call-overload]
             repair_results["foreign_keys_fixed"] = True
 
-            # Remove orphaned search indexes
+            # Remove orphaned search indexes (anti-join on repo_id)
             orphan_result = session.exec(
                 text(
                     """
                 DELETE FROM searchindex
-                WHERE repo_id NOT IN (SELECT id FROM repository)
+                WHERE rowid IN (
+                    SELECT s.rowid FROM searchindex s
+                    LEFT JOIN repository r ON r.id = s.repo_id
+                    WHERE r.id IS NULL
+                )
             """
                 )
             )
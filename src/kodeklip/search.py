@@ -1,31 +1,140 @@
 """
 Search functionality for KodeKlip using ripgrep integration.
 
-This module provides fast keyword search capabilities using ripgrepy
-Python wrapper for structured ripgrep operations.
+This module provides fast keyword search capabilities by streaming
+ripgrep's JSON Lines output (``rg --json``) into structured results.
 """
 
+import base64
+import functools
 import hashlib
-import json
+import itertools
+import os
+import re
 import shutil
-from dataclasses import dataclass, field
-from datetime import datetime, timedelta
+import sqlite3
+import subprocess
+import threading
+import time
+from collections import OrderedDict, deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field, replace
 from pathlib import Path
 from typing import Any, Union
 
+import orjson
+from pygments.lexer import Lexer
+from pygments.lexers import get_lexer_by_name
+from pygments.util import ClassNotFound
 from rich.console import Console
 from rich.panel import Panel
 from rich.syntax import Syntax
 from rich.table import Table
 from rich.text import Text
-from ripgrepy import Ripgrepy
 from sqlmodel import Session, select
 
-from .database import get_engine
+from .database import DatabaseConfig, get_engine
 from .models import Repository
 
+# File extension (without the dot) -> syntax highlighting language
+_SEARCH_EXT_MAP: dict[str, str] = {
+    'py': 'python',
+    'js': 'javascript',
+    'ts': 'typescript',
+    'rs': 'rust',
+    'go': 'go',
+    'java': 'java',
+    'c': 'c',
+    'cpp': 'cpp',
+    'h': 'c',
+    'hpp': 'cpp',
+    'md': 'markdown',
+    'json': 'json',
+    'yaml': 'yaml',
+    'yml': 'yaml',
+    'xml': 'xml',
+    'html': 'html',
+    'css': 'css',
+    'sql': 'sql',
+    'sh': 'bash',
+    'bash': 'bash',
+}
+
+
+@functools.lru_cache(maxsize=64)
+def cached_lexer(language: str) -> Lexer | str:
+    """
+    Resolve a Pygments lexer once per language name.
+
+    Rich's Syntax looks the lexer up by name on every construction; passing
+    the resolved instance skips that. Unknown names are returned unchanged so
+    Syntax can fall back to plain text as before.
+    """
+    try:
+        return get_lexer_by_name(language)
+    except ClassNotFound:
+        return language
+
+
+@functools.cache
+def _detect_rg_path() -> str | None:
+    """Find the ripgrep binary once per process, preferring PATH."""
+    rg_path = shutil.which('rg')
+    if rg_path:
+        return rg_path
+
+    # Common install locations that may be missing from PATH
+    candidates = [
+        '/usr/local/bin/rg',  # Homebrew
+        '/opt/homebrew/bin/rg',  # M1 Homebrew
+        # Claude Code
+        '/opt/homebrew/lib/node_modules/@anthropic-ai/claude-code/'
+        'vendor/ripgrep/arm64-darwin/rg',
+    ]
+    for candidate in candidates:
+        if shutil.which(candidate):
+            return candidate
+
+    return None
+
+
+@functools.cache
+def _ripgrep_works(rg_path: str) -> bool:
+    """Run `rg --version` once per process for each ripgrep binary."""
+    try:
+        result = subprocess.run([rg_path, '--version'], capture_output=True, timeout=10)
+        return result.returncode == 0
+    except Exception:
+        return False
+
+
+_RG_TYPE_PREFIX = b'{"type":"'
+
+
+def _rg_event_type(line: bytes) -> str | None:
+    """Read a ripgrep JSON event's type without decoding the whole line."""
+    # ripgrep always serialises "type" first; anything else is decoded fully
+    if line.startswith(_RG_TYPE_PREFIX):
+        start = len(_RG_TYPE_PREFIX)
+        end = line.find(b'"', start)
+        if end != -1:
+            return line[start:end].decode('ascii', errors='replace')
+    try:
+        event = orjson.loads(line)
+    except orjson.JSONDecodeError:
+        return None
+    return event.get('type') if isinstance(event, dict) else None
 
-@dataclass
+
+def _rg_text(value: dict[str, Any]) -> str:
+    """Decode a ripgrep JSON string object, which is either UTF-8 text or base64."""
+    if 'text' in value:
+        return str(value['text'])
+    return base64.b64decode(value.get('bytes', '')).decode('utf-8', errors='replace')
+
+
+@dataclass(frozen=True, slots=True)
 class SearchResult:
     """Structured search result from ripgrep."""
 
@@ -34,8 +143,20 @@ class SearchResult:
     line_content: str
     match_start: int = 0
     match_end: int = 0
-    context_before: list[str] = field(default_factory=list)
-    context_after: list[str] = field(default_factory=list)
+    context_before: tuple[str, ...] = ()
+    context_after: tuple[str, ...] = ()
+    # Derived from file_path once; slots rule out functools.cached_property
+    _extension: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        """Freeze context lines and precompute the file extension."""
+        if not isinstance(self.context_before, tuple):
+            object.__setattr__(self, 'context_before', tuple(self.context_before))
+        if not isinstance(self.context_after, tuple):
+            object.__setattr__(self, 'context_after', tuple(self.context_after))
+        object.__setattr__(
+            self, '_extension', os.path.splitext(self.file_path)[1][1:]
+        )
 
     @property
     def relative_path(self) -> str:
@@ -45,7 +166,7 @@ class SearchResult:
     @property
     def file_extension(self) -> str:
         """Get file extension for syntax highlighting."""
-        return Path(self.file_path).suffix.lstrip('.')
+        return self._extension
 
     def __str__(self) -> str:
         """String representation for display."""
@@ -71,7 +192,7 @@ class SearchResult:
         if language:
             renderable = Syntax(
                 content,
-                language,
+                cached_lexer(language),
                 line_numbers=True,
                 start_line=max(1, self.line_number - len(self.context_before))
             )
@@ -88,29 +209,7 @@ class SearchResult:
 
     def _get_language_for_extension(self) -> str | None:
         """Map file extension to syntax highlighting language."""
-        ext_map = {
-            'py': 'python',
-            'js': 'javascript',
-            'ts': 'typescript',
-            'rs': 'rust',
-            'go': 'go',
-            'java': 'java',
-            'c': 'c',
-            'cpp': 'cpp',
-            'h': 'c',
-            'hpp': 'cpp',
-            'md': 'markdown',
-            'json': 'json',
-            'yaml': 'yaml',
-            'yml': 'yaml',
-            'xml': 'xml',
-            'html': 'html',
-            'css': 'css',
-            'sql': 'sql',
-            'sh': 'bash',
-            'bash': 'bash',
-        }
-        return ext_map.get(self.file_extension.lower())
+        return _SEARCH_EXT_MAP.get(self.file_extension.lower())
 
     def to_dict(self) -> dict[str, Any]:
         """Convert to dictionary for JSON serialization."""
@@ -120,65 +219,224 @@ class SearchResult:
             'line_content': self.line_content,
             'match_start': self.match_start,
             'match_end': self.match_end,
-            'context_before': self.context_before,
-            'context_after': self.context_after,
+            'context_before': list(self.context_before),
+            'context_after': list(self.context_after),
         }
 
 
-@dataclass
+def _with_context_after(result: SearchResult, after: list[str]) -> SearchResult:
+    """Attach (and reset) the trailing context collected for a match."""
+    if not after:
+        return result
+    completed = replace(result, context_after=tuple(after))
+    after.clear()
+    return completed
+
+
+# Characters that give a ripgrep pattern regex meaning
+_REGEX_META = re.compile(r'[.^$*+?()|\[\]{}\\]')
+
+
+@dataclass(frozen=True)
 class SearchOptions:
     """Configuration options for search operations."""
 
-    file_types: list[str] = field(default_factory=list)
-    exclude_types: list[str] = field(default_factory=list)
+    file_types: tuple[str, ...] = ()
+    exclude_types: tuple[str, ...] = ()
     context_before: int = 0
     context_after: int = 0
     ignore_case: bool = False
     smart_case: bool = True
     regex_mode: bool = True
     max_results: int = 1000
-    include_patterns: list[str] = field(default_factory=list)
-    exclude_patterns: list[str] = field(default_factory=list)
+    include_patterns: tuple[str, ...] = ()
+    exclude_patterns: tuple[str, ...] = ()
+    # None: literal when regex_mode is off or the query has no regex syntax
+    fixed_strings: bool | None = None
+
+    def __post_init__(self) -> None:
+        """Coerce list arguments to tuples so options stay hashable."""
+        for name in (
+            'file_types', 'exclude_types', 'include_patterns', 'exclude_patterns'
+        ):
+            value = getattr(self, name)
+            if not isinstance(value, tuple):
+                object.__setattr__(self, name, tuple(value))
+
+    def use_fixed_strings(self, query: str) -> bool:
+        """
+        Decide whether ripgrep should treat the query as a literal string.
+
+        Literal searches (``--fixed-strings``) skip the regex engine and go
+        straight to ripgrep's SIMD substring matchers, which is typically
+        several times faster for plain identifiers.
+        """
+        if self.fixed_strings is not None:
+            return self.fixed_strings
+        if not self.regex_mode:
+            return True
+        # A pattern without metacharacters matches exactly like the literal
+        return _REGEX_META.search(query) is None
+
+
+@functools.lru_cache(maxsize=64)
+def _rg_flags(options: SearchOptions) -> tuple[str, ...]:
+    """Build the ripgrep flags for a set of options, once per distinct options."""
+    # --no-messages keeps stderr small so it can't fill its pipe mid-search
+    flags = ['--json', '--line-number', '--no-messages']
+
+    # File type filters
+    for file_type in options.file_types:
+        flags.extend(['--type', file_type])
+    for exclude_type in options.exclude_types:
+        flags.extend(['--type-not', exclude_type])
+
+    # Include/exclude patterns
+    for pattern in options.include_patterns:
+        flags.extend(['--glob', pattern])
+    for pattern in options.exclude_patterns:
+        flags.extend(['--glob', f"!{pattern}"])
+
+    # Context lines
+    if options.context_before > 0:
+        flags.extend(['-B', str(options.context_before)])
+    if options.context_after > 0:
+        flags.extend(['-A', str(options.context_after)])
+
+    # Case sensitivity
+    if options.ignore_case:
+        flags.append('--ignore-case')
+    elif options.smart_case:
+        flags.append('--smart-case')
+
+    # Limit results
+    flags.extend(['--max-count', str(options.max_results)])
+    return tuple(flags)
+
+
+def _search_key(
+    repo_alias: str, query: str, options: SearchOptions, revision: str = ""
+) -> int:
+    """Hash search parameters into a signed 64-bit cache key."""
+
+    def _joined(values: tuple[str, ...]) -> bytes:
+        return b'\x01'.join(value.encode() for value in sorted(values))
+
+    def _int(value: int) -> bytes:
+        return value.to_bytes(8, 'little', signed=True)
+
+    # Fixed field order stands in for json.dumps(sort_keys=True)
+    key_data = b'\x00'.join((
+        repo_alias.encode(),
+        query.encode(),
+        _joined(options.file_types),
+        _joined(options.exclude_types),
+        _joined(options.include_patterns),
+        _joined(options.exclude_patterns),
+        _int(options.context_before),
+        _int(options.context_after),
+        _int(options.max_results),
+        bytes((
+            options.ignore_case,
+            options.smart_case,
+            options.regex_mode,
+            2 if options.fixed_strings is None else options.fixed_strings,
+        )),
+        revision.encode(),
+    ))
+    digest = hashlib.blake2b(key_data, digest_size=8).digest()
+    # Signed so the key also fits an SQLite INTEGER PRIMARY KEY
+    return int.from_bytes(digest, 'little', signed=True)
+
+
+def _read_head_sha(repo_path: Path) -> str | None:
+    """Resolve a checkout's HEAD commit from .git without running git."""
+    git_dir = repo_path / '.git'
+    try:
+        if git_dir.is_file():
+            # Worktrees and submodules point at their real git dir
+            gitdir = git_dir.read_text().strip().removeprefix('gitdir:').strip()
+            git_dir = (repo_path / gitdir).resolve()
+
+        head = (git_dir / 'HEAD').read_text().strip()
+        if not head.startswith('ref:'):
+            return head  # Detached HEAD
+        ref = head[4:].strip()
+
+        ref_file = git_dir / ref
+        if ref_file.is_file():
+            return ref_file.read_text().strip()
+        packed_refs = git_dir / 'packed-refs'
+        if packed_refs.is_file():
+            for line in packed_refs.read_text().splitlines():
+                sha, _, name = line.partition(' ')
+                if name == ref:
+                    return sha
+    except OSError:
+        pass
+    return None
+
+
+def _clean_revision(repo_path: Path) -> str | None:
+    """
+    Resolve a checkout's HEAD commit, or None if its working tree has changes.
+
+    HEAD says nothing about edited or untracked files, so results for a
+    dirty checkout can't be keyed on it.
+    """
+    revision = _read_head_sha(repo_path)
+    if revision is None:
+        return None
+    try:
+        status = subprocess.run(
+            ['git', '-C', str(repo_path), 'status', '--porcelain'],
+            capture_output=True,
+            timeout=30,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if status.returncode != 0 or status.stdout:
+        return None
+    return revision
 
 
 @dataclass
 class SearchCache:
-    """Simple in-memory cache for search results."""
-
-    cache: dict[str, dict[str, Any]] = field(default_factory=dict)
-    cache_ttl: timedelta = field(default_factory=lambda: timedelta(minutes=10))
-
-    def _make_key(self, repo_alias: str, query: str, options: SearchOptions) -> str:
+    """Bounded in-memory LRU cache for search results."""
+
+    # Entries are (time.monotonic() when stored, results)
+    cache: OrderedDict[int, tuple[float, tuple[SearchResult, ...]]] = field(
+        default_factory=OrderedDict
+    )
+    cache_ttl_seconds: float = 600.0
+    maxsize: int = 256
+    # Guards `cache` when repositories are searched from worker threads
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    def _make_key(self, repo_alias: str, query: str, options: SearchOptions) -> int:
         """Create cache key from search parameters."""
-        options_dict = {
-            'file_types': sorted(options.file_types),
-            'exclude_types': sorted(options.exclude_types),
-            'context_before': options.context_before,
-            'context_after': options.context_after,
-            'ignore_case': options.ignore_case,
-            'smart_case': options.smart_case,
-            'regex_mode': options.regex_mode,
-            'max_results': options.max_results,
-            'include_patterns': sorted(options.include_patterns),
-            'exclude_patterns': sorted(options.exclude_patterns),
-        }
-        key_data = f"{repo_alias}:{query}:{json.dumps(options_dict, sort_keys=True)}"
-        return hashlib.md5(key_data.encode()).hexdigest()
+        return _search_key(repo_alias, query, options)
 
     def get(
         self, repo_alias: str, query: str, options: SearchOptions
     ) -> list[SearchResult] | None:
         """Get cached results if still valid."""
         key = self._make_key(repo_alias, query, options)
-        if key in self.cache:
-            entry = self.cache[key]
-            if datetime.now() - entry['timestamp'] < self.cache_ttl:
-                # Reconstruct SearchResult objects
-                return [SearchResult(**result) for result in entry['results']]
-            else:
+        with self._lock:
+            entry = self.cache.get(key)
+            if entry is None:
+                return None
+            timestamp, results = entry
+            if time.monotonic() - timestamp >= self.cache_ttl_seconds:
                 # Cache expired
                 del self.cache[key]
-        return None
+                return None
+            self.cache.move_to_end(key)
+        # A new list keeps callers off the cached tuple; the frozen results in
+        # it are shared, not copied
+        return list(results)
 
     def set(
         self,
@@ -189,14 +447,100 @@ class SearchCache:
     ) -> None:
         """Cache search results."""
         key = self._make_key(repo_alias, query, options)
-        self.cache[key] = {
-            'timestamp': datetime.now(),
-            'results': [result.to_dict() for result in results]
-        }
+        entry = (time.monotonic(), tuple(results))
+        with self._lock:
+            self.cache[key] = entry
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.maxsize:
+                # Evict the least recently used entry
+                self.cache.popitem(last=False)
 
     def clear(self) -> None:
         """Clear all cached results."""
-        self.cache.clear()
+        with self._lock:
+            self.cache.clear()
+
+
+class DiskSearchCache:
+    """SQLite-backed search result cache that persists across CLI runs."""
+
+    def __init__(self, path: Path | None = None, ttl_seconds: float = 600.0):
+        """
+        Initialize DiskSearchCache.
+
+        Args:
+            path: Cache database file. Defaults to search_cache.sqlite next to
+                the KodeKlip database.
+            ttl_seconds: How long stored results stay valid.
+        """
+        self.path = path or DatabaseConfig().kodeklip_dir / "search_cache.sqlite"
+        self.ttl_seconds = ttl_seconds
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the cache database on first use and drop expired entries."""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                self.path, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS search_cache ("
+                "key INTEGER PRIMARY KEY, expires REAL NOT NULL, payload BLOB NOT NULL)"
+            )
+            conn.execute("DELETE FROM search_cache WHERE expires < ?", (time.time(),))
+            self._conn = conn
+        return self._conn
+
+    def get(
+        self, repo_alias: str, query: str, options: SearchOptions, revision: str
+    ) -> list[SearchResult] | None:
+        """Get stored results for this repository revision if still valid."""
+        key = _search_key(repo_alias, query, options, revision)
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT payload FROM search_cache WHERE key = ? AND expires > ?",
+                    (key, time.time()),
+                ).fetchone()
+        except sqlite3.Error:
+            # A broken cache file should never break searching
+            return None
+        if row is None:
+            return None
+        return [SearchResult(**result) for result in orjson.loads(row[0])]
+
+    def set(
+        self,
+        repo_alias: str,
+        query: str,
+        options: SearchOptions,
+        revision: str,
+        results: list[SearchResult],
+    ) -> None:
+        """Store results for this repository revision."""
+        key = _search_key(repo_alias, query, options, revision)
+        payload = orjson.dumps([result.to_dict() for result in results])
+        try:
+            with self._lock:
+                self._connect().execute(
+                    "INSERT OR REPLACE INTO search_cache (key, expires, payload) "
+                    "VALUES (?, ?, ?)",
+                    (key, time.time() + self.ttl_seconds, payload),
+                )
+        except sqlite3.Error:
+            pass
+
+    def clear(self) -> None:
+        """Clear all stored results."""
+        try:
+            with self._lock:
+                self._connect().execute("DELETE FROM search_cache")
+        except sqlite3.Error:
+            pass
 
 
 class SearchResultFormatter:
@@ -231,12 +575,12 @@ class SearchResultFormatter:
 
     def format_results_detailed(
         self, results: list[SearchResult], query: str = ""
-    ) -> list[Panel]:
-        """Format search results as detailed panels."""
-        panels = []
-        for result in results[:10]:  # Limit to first 10 for detailed view
-            panels.append(result.to_rich_panel(self.console, query))
-        return panels
+    ) -> Iterator[Panel]:
+        """Lazily format search results as detailed panels."""
+        # Limit to first 10 for detailed view; each panel is only rendered
+        # (and lexed) when the caller asks for it
+        for result in itertools.islice(results, 10):
+            yield result.to_rich_panel(self.console, query)
 
     def format_summary(
         self, results_dict: dict[str, list[SearchResult]], query: str = ""
@@ -259,58 +603,38 @@ class SearchResultFormatter:
 class RipgrepSearcher:
     """Fast search functionality using ripgrep."""
 
-    def __init__(self, rg_path: str | None = None, enable_cache: bool = True):
+    def __init__(
+        self,
+        rg_path: str | None = None,
+        enable_cache: bool = True,
+        persist_cache: bool = False,
+    ):
         """
         Initialize RipgrepSearcher.
 
         Args:
             rg_path: Optional path to ripgrep binary. If None, will attempt to detect.
             enable_cache: Whether to enable result caching.
+            persist_cache: Whether to also keep results on disk across runs.
         """
-        self.rg_path = self._detect_ripgrep_path() if rg_path is None else rg_path
-        if not self.rg_path:
+        detected = self._detect_ripgrep_path() if rg_path is None else rg_path
+        if not detected:
             raise RuntimeError(
                 "ripgrep binary not found. Please install ripgrep: "
                 "https://github.com/BurntSushi/ripgrep#installation"
             )
+        self.rg_path: str = detected
         self.cache = SearchCache() if enable_cache else None
+        self.disk_cache = DiskSearchCache() if persist_cache else None
         self.formatter = SearchResultFormatter()
 
     def _detect_ripgrep_path(self) -> str | None:
         """Detect ripgrep binary path with fallbacks."""
-        # Try common locations and aliases
-        candidates = [
-            'rg',  # In PATH
-            '/usr/local/bin/rg',  # Homebrew
-            '/opt/homebrew/bin/rg',  # M1 Homebrew
-            # Claude Code
-            '/opt/homebrew/lib/node_modules/@anthropic-ai/claude-code/'
-            'vendor/ripgrep/arm64-darwin/rg',
-        ]
-
-        for candidate in candidates:
-            if shutil.which(candidate):
-                return candidate
-
-        # Check if we can resolve the aliased version
-        import subprocess
-        try:
-            result = subprocess.run(['which', 'rg'], capture_output=True, text=True)
-            if result.returncode == 0:
-                return result.stdout.strip()
-        except Exception:
-            pass
-
-        return None
+        return _detect_rg_path()
 
     def validate_ripgrep(self) -> bool:
         """Validate that ripgrep is working correctly."""
-        try:
-            # Just test that we can create the object - don't run a search
-            Ripgrepy('test', '.', rg_path=self.rg_path)
-            return True
-        except Exception:
-            return False
+        return _ripgrep_works(self.rg_path)
 
     def search_repository(
         self,
@@ -355,6 +679,17 @@ class RipgrepSearcher:
             if not repo_path.exists():
                 raise ValueError(f"Repository path does not exist: {repo_path}")
 
+        # Persisted results are keyed on the checked-out commit, so a pull
+        # or checkout never serves stale matches; checkouts with local
+        # changes aren't persisted at all
+        revision = _clean_revision(repo_path) if self.disk_cache else None
+        if self.disk_cache and revision:
+            disk_results = self.disk_cache.get(alias, query, options, revision)
+            if disk_results is not None:
+                if self.cache:
+                    self.cache.set(alias, query, options, disk_results)
+                return disk_results
+
         # Execute ripgrep search
         try:
             results = self._execute_search(str(repo_path), query, options)
@@ -362,11 +697,27 @@ class RipgrepSearcher:
             # Cache results
             if self.cache:
                 self.cache.set(alias, query, options, results)
+            if self.disk_cache and revision:
+                self.disk_cache.set(alias, query, options, revision, results)
 
             return results
         except Exception as e:
             raise RuntimeError(f"Search failed: {str(e)}") from e
 
+    def _build_command(
+        self,
+        repo_path: str,
+        query: str,
+        options: SearchOptions
+    ) -> list[str]:
+        """Build the ripgrep argument vector for a JSON search."""
+        cmd = [self.rg_path, *_rg_flags(options)]
+        if options.use_fixed_strings(query):
+            cmd.append('--fixed-strings')
+        # '--' stops queries starting with '-' from being read as flags
+        cmd.extend(['--', query, repo_path])
+        return cmd
+
     def _execute_search(
         self,
         repo_path: str,
@@ -374,86 +725,99 @@ class RipgrepSearcher:
         options: SearchOptions
     ) -> list[SearchResult]:
         """Execute the actual ripgrep search."""
-        # Create ripgrepy instance
-        rg = Ripgrepy(query, repo_path, rg_path=self.rg_path)
-
-        # Configure search options
-        rg = rg.with_filename().line_number()
-
-        # File type filters
-        for file_type in options.file_types:
-            rg = rg.type_(file_type)
-        for exclude_type in options.exclude_types:
-            rg = rg.type_not(exclude_type)
-
-        # Include/exclude patterns
-        for pattern in options.include_patterns:
-            rg = rg.glob(pattern)
-        for pattern in options.exclude_patterns:
-            rg = rg.glob(f"!{pattern}")
-
-        # Context lines
-        if options.context_before > 0:
-            rg = rg.before_context(options.context_before)
-        if options.context_after > 0:
-            rg = rg.after_context(options.context_after)
-
-        # Case sensitivity
-        if options.ignore_case:
-            rg = rg.ignore_case()
-        elif options.smart_case:
-            rg = rg.smart_case()
-
-        # Limit results
-        rg = rg.max_count(options.max_results)
-
-        # Execute search
-        result = rg.run()
-
-        # Parse results
-        return self._parse_ripgrep_results(result.as_string, repo_path)
-
-    def _parse_ripgrep_results(self, output: str, repo_path: str) -> list[SearchResult]:
-        """Parse ripgrep output into SearchResult objects."""
-        results = []
-        repo_path_obj = Path(repo_path)
-
-        for line in output.splitlines():
-            if not line.strip():
-                continue
+        cmd = self._build_command(repo_path, query, options)
+
+        with subprocess.Popen(
+            cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=1 << 20
+        ) as proc:
+            assert proc.stdout is not None and proc.stderr is not None
+            # --max-count only limits matches per file, so cap the total here
+            results = list(itertools.islice(
+                self._iter_ripgrep_results(proc.stdout, repo_path, options),
+                options.max_results,
+            ))
+            if len(results) >= options.max_results:
+                # Enough matches; stop ripgrep walking the rest of the tree
+                proc.terminate()
+            stderr = proc.stderr.read()
+
+        # ripgrep exits with 1 when nothing matched and 2 on errors; an error
+        # alongside matches (e.g. one unreadable file) still yields results
+        if proc.returncode == 2 and not results:
+            message = stderr.decode('utf-8', errors='replace').strip()
+            raise RuntimeError(message or "ripgrep exited with an error")
 
-            # Parse ripgrep output format: file:line:content
-            parts = line.split(':', 2)
-            if len(parts) < 3:
+        return results
+
+    def _iter_ripgrep_results(
+        self,
+        lines: Iterable[bytes],
+        repo_path: str,
+        options: SearchOptions
+    ) -> Iterator[SearchResult]:
+        """Stream ripgrep JSON Lines output into SearchResult objects."""
+        repo_prefix = repo_path.rstrip(os.sep) + os.sep
+        before: deque[str] = deque(maxlen=options.context_before)
+        # The latest match is held back until its trailing context arrives
+        pending: SearchResult | None = None
+        after: list[str] = []
+
+        for line in lines:
+            # Only match and context events are decoded; begin/end/summary
+            # lines are recognised from their prefix alone
+            event_type = _rg_event_type(line)
+            if event_type in ('begin', 'end'):
+                # Context never carries across file boundaries
+                if pending is not None:
+                    yield _with_context_after(pending, after)
+                    pending = None
+                before.clear()
+                continue
+            if event_type not in ('match', 'context'):
                 continue
 
             try:
-                file_path = parts[0]
-                line_number = int(parts[1])
-                line_content = parts[2]
-
-                # Make path relative to repo
-                abs_file_path = Path(file_path)
-                if abs_file_path.is_absolute():
-                    try:
-                        relative_path = abs_file_path.relative_to(repo_path_obj)
-                        file_path = str(relative_path)
-                    except ValueError:
-                        # Path is not relative to repo_path, keep as-is
-                        pass
-
-                result = SearchResult(
-                    file_path=file_path,
-                    line_number=line_number,
-                    line_content=line_content
-                )
-                results.append(result)
-
-            except (ValueError, IndexError):
+                data = orjson.loads(line)['data']
+            except (orjson.JSONDecodeError, KeyError, TypeError):
                 # Skip malformed lines
                 continue
+            line_number = data['line_number']
+            line_content = _rg_text(data['lines']).rstrip('\r\n')
+
+            if event_type == 'context':
+                if (
+                    pending is not None
+                    and line_number - pending.line_number <= options.context_after
+                ):
+                    after.append(line_content)
+                if options.context_before > 0:
+                    before.append(line_content)
+                continue
 
-        return results
+            # Make path relative to repo; ripgrep prefixes every path with
+            # the search root exactly as it was passed on the command line
+            file_path = _rg_text(data['path'])
+            if file_path.startswith(repo_prefix):
+                file_path = file_path[len(repo_prefix):]
+
+            submatches = data.get('submatches') or []
+            match_start = submatches[0]['start'] if submatches else 0
+            match_end = submatches[0]['end'] if submatches else 0
+
+            if pending is not None:
+                yield _with_context_after(pending, after)
+            pending = SearchResult(
+                file_path=file_path,
+                line_number=line_number,
+                line_content=line_content,
+                match_start=match_start,
+                match_end=match_end,
+                context_before=tuple(before),
+            )
+            before.clear()
+
+        if pending is not None:
+            yield _with_context_after(pending, after)
 
     def search_all_repositories(
         self,
@@ -473,23 +837,32 @@ class RipgrepSearcher:
         if options is None:
             options = SearchOptions()
 
-        results = {}
         engine = get_engine()
-
         with Session(engine) as session:
-            statement = select(Repository)
-            repositories = session.exec(statement).all()
-
-            for repo in repositories:
+            aliases = list(session.exec(select(Repository.alias)).all())
+
+        if not aliases:
+            return {}
+
+        # Each search blocks on its own ripgrep subprocess, so threads overlap
+        # the directory walks instead of running them back to back
+        found: dict[str, list[SearchResult]] = {}
+        with ThreadPoolExecutor(max_workers=min(32, len(aliases))) as executor:
+            futures = {
+                executor.submit(self.search_repository, alias, query, options): alias
+                for alias in aliases
+            }
+            for future in as_completed(futures):
                 try:
-                    repo_results = self.search_repository(repo.alias, query, options)
-                    if repo_results:  # Only include repos with results
-                        results[repo.alias] = repo_results
+                    repo_results = future.result()
                 except Exception:
                     # Skip repositories that fail to search
                     continue
+                if repo_results:  # Only include repos with results
+                    found[futures[future]] = repo_results
 
-        return results
+        # Keep the database ordering regardless of completion order
+        return {alias: found[alias] for alias in aliases if alias in found}
 
 
 def create_searcher() -> RipgrepSearcher:
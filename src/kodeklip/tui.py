@@ -5,6 +5,11 @@ This module provides a two-pane terminal interface for browsing search results,
 previewing files with syntax highlighting, and copying code to clipboard.
 """
 
+import bisect
+import mmap
+import os
+from collections.abc import Callable, Iterator
+from functools import lru_cache, partial
 from pathlib import Path
 from typing import Any
 
@@ -12,6 +17,7 @@ import pyperclip
 from rich.syntax import Syntax
 from textual.app import App, ComposeResult
 from textual.containers import Container
+from textual.coordinate import Coordinate
 from textual.widgets import (
     DataTable,
     Header,
@@ -19,7 +25,87 @@ from textual.widgets import (
     Static,
 )
 
-from .search import SearchResult
+from .search import SearchResult, cached_lexer
+
+# Files at least this large are memory-mapped for previews instead of read whole
+_MMAP_MIN_SIZE = 64 * 1024
+
+# Granularity of the sparse line index kept for memory-mapped previews
+_LINE_INDEX_BLOCK = 64 * 1024
+
+# File suffix -> syntax highlighting language for the preview pane
+_TUI_EXT_MAP: dict[str, str] = {
+    '.py': 'python',
+    '.js': 'javascript',
+    '.ts': 'typescript',
+    '.jsx': 'jsx',
+    '.tsx': 'tsx',
+    '.rs': 'rust',
+    '.go': 'go',
+    '.java': 'java',
+    '.c': 'c',
+    '.cpp': 'cpp',
+    '.cc': 'cpp',
+    '.cxx': 'cpp',
+    '.h': 'c',
+    '.hpp': 'cpp',
+    '.md': 'markdown',
+    '.json': 'json',
+    '.yaml': 'yaml',
+    '.yml': 'yaml',
+    '.xml': 'xml',
+    '.html': 'html',
+    '.css': 'css',
+    '.sql': 'sql',
+    '.sh': 'bash',
+    '.bash': 'bash',
+    '.zsh': 'zsh',
+    '.php': 'php',
+    '.rb': 'ruby',
+    '.swift': 'swift',
+    '.kt': 'kotlin',
+    '.scala': 'scala',
+}
+
+
+@lru_cache(maxsize=32)
+def _line_index(path: str, _mtime_ns: int, size: int) -> tuple[int, ...]:
+    """
+    Count the newlines before each _LINE_INDEX_BLOCK-sized block of a file.
+
+    Entry i is the number of lines that end before byte i * _LINE_INDEX_BLOCK;
+    the last entry is the total. The modification time only keys the cache,
+    so an edited file is indexed again.
+    """
+    counts = [0]
+    with open(path, 'rb') as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mm:
+        for offset in range(0, size, _LINE_INDEX_BLOCK):
+            block = mm[offset:offset + _LINE_INDEX_BLOCK]
+            counts.append(counts[-1] + block.count(b'\n'))
+    return tuple(counts)
+
+
+def _line_offset(mm: mmap.mmap, index: tuple[int, ...], line: int) -> int:
+    """Byte offset where 0-based line starts, or len(mm) past the last line."""
+    if line <= 0:
+        return 0
+    # The block holding the newline that ends line - 1
+    block = bisect.bisect_left(index, line) - 1
+    if block >= len(index) - 1:
+        return len(mm)
+    start = block * _LINE_INDEX_BLOCK
+    chunk = mm[start:start + _LINE_INDEX_BLOCK]
+    rest = chunk.split(b'\n', line - index[block])[-1]
+    return start + len(chunk) - len(rest)
+
+
+def _truncate(text: str, width: int) -> str:
+    """Truncate text to width characters, ending with an ellipsis if cut."""
+    if len(text) > width:
+        return text[:width - 3] + "..."
+    return text
 
 
 class SearchResultsTable(DataTable):
@@ -29,7 +115,8 @@ class SearchResultsTable(DataTable):
         """Initialize with search results."""
         super().__init__(**kwargs)
         self.results = results
-        self.selected_rows: set[int] = set()  # Use regular set instead of reactive
+        # Bit i is set when row i is selected
+        self._selection_mask = 0
         self.cursor_type = "row"
         self.zebra_stripes = True
         self.show_header = True
@@ -39,42 +126,48 @@ class SearchResultsTable(DataTable):
         # Add columns
         self.add_columns("", "File", "Line", "Content")
 
-        # Add data rows
-        for i, result in enumerate(self.results):
-            # Truncate long content for table display
-            content = result.line_content.strip()
-            if len(content) > 60:
-                content = content[:57] + "..."
-
-            self.add_row(
+        # Add data rows in one batch; rows are addressed by index, not key
+        self.add_rows([
+            (
                 "",  # Selection indicator
                 result.file_path,
                 str(result.line_number),
-                content,
-                key=str(i)
+                _truncate(result.line_content.strip(), 60),
             )
+            for result in self.results
+        ])
+
+    @property
+    def selected_rows(self) -> frozenset[int]:
+        """Indices of the currently selected rows."""
+        return frozenset(self._iter_selected())
+
+    @property
+    def selected_count(self) -> int:
+        """Number of currently selected rows."""
+        return self._selection_mask.bit_count()
+
+    def _iter_selected(self) -> Iterator[int]:
+        """Yield selected row indices in ascending order."""
+        mask = self._selection_mask
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
 
     def toggle_row_selection(self, row_index: int) -> None:
         """Toggle selection state of a row."""
-        if row_index in self.selected_rows:
-            self.selected_rows.remove(row_index)
-            # Use string key as set in add_row
-            try:
-                self.update_cell(str(row_index), "0", "")  # Use string for column key
-            except Exception:
-                # If cells don't exist yet (e.g., in tests), just track selection
-                pass
-        else:
-            self.selected_rows.add(row_index)
-            try:
-                self.update_cell(str(row_index), "0", "✓")  # Use string for column key
-            except Exception:
-                # If cells don't exist yet (e.g., in tests), just track selection
-                pass
+        self._selection_mask ^= 1 << row_index
+        marker = "✓" if (self._selection_mask >> row_index) & 1 else ""
+        try:
+            self.update_cell_at(Coordinate(row_index, 0), marker)
+        except Exception:
+            # If cells don't exist yet (e.g., in tests), just track selection
+            pass
 
     def get_selected_results(self) -> list[SearchResult]:
         """Get currently selected search results."""
-        return [self.results[i] for i in self.selected_rows]
+        return [self.results[i] for i in self._iter_selected()]
 
     def get_current_result(self) -> SearchResult | None:
         """Get the currently highlighted result."""
@@ -105,24 +198,44 @@ class FilePreview(RichLog):
                 self.write(f"[red]File not found: {full_path}[/red]")
                 return
 
-            # Read file content
-            content = full_path.read_text(encoding='utf-8', errors='replace')
-            lines = content.splitlines()
-
-            # Calculate context window
             context_lines = 10
-            start_line = max(0, result.line_number - context_lines - 1)
-            end_line = min(len(lines), result.line_number + context_lines)
+            try:
+                file_size = full_path.stat().st_size
+            except OSError:
+                file_size = 0
+
+            window: tuple[list[str], int] | None
+            if file_size >= _MMAP_MIN_SIZE:
+                # Large file: decode only the lines around the match
+                window = self._read_window(
+                    full_path, result.line_number, context_lines
+                )
+            else:
+                # Read file content
+                content = full_path.read_text(encoding='utf-8', errors='replace')
+                if '\x00' in content[:1024]:
+                    window = None
+                else:
+                    lines = content.splitlines()
+
+                    # Calculate context window
+                    start_line = max(0, result.line_number - context_lines - 1)
+                    end_line = min(len(lines), result.line_number + context_lines)
+                    window = (lines[start_line:end_line], start_line)
+
+            if window is None:
+                self.write(f"[yellow]Binary file, no preview: {full_path}[/yellow]")
+                return
 
             # Extract context
-            context_content = lines[start_line:end_line]
+            context_content, start_line = window
 
             # Create syntax highlighted preview
-            language = self._detect_language(result.file_path)
+            language = self.detect_language(result.file_path)
             if language and context_content:
                 syntax = Syntax(
                     '\n'.join(context_content),
-                    language,
+                    cached_lexer(language),
                     line_numbers=True,
                     start_line=start_line + 1,
                     highlight_lines={result.line_number}
@@ -137,43 +250,39 @@ class FilePreview(RichLog):
         except Exception as e:
             self.write(f"[red]Error reading file: {str(e)}[/red]")
 
-    def _detect_language(self, file_path: str) -> str | None:
-        """Detect programming language from file extension."""
-        ext_map = {
-            '.py': 'python',
-            '.js': 'javascript',
-            '.ts': 'typescript',
-            '.jsx': 'jsx',
-            '.tsx': 'tsx',
-            '.rs': 'rust',
-            '.go': 'go',
-            '.java': 'java',
-            '.c': 'c',
-            '.cpp': 'cpp',
-            '.cc': 'cpp',
-            '.cxx': 'cpp',
-            '.h': 'c',
-            '.hpp': 'cpp',
-            '.md': 'markdown',
-            '.json': 'json',
-            '.yaml': 'yaml',
-            '.yml': 'yaml',
-            '.xml': 'xml',
-            '.html': 'html',
-            '.css': 'css',
-            '.sql': 'sql',
-            '.sh': 'bash',
-            '.bash': 'bash',
-            '.zsh': 'zsh',
-            '.php': 'php',
-            '.rb': 'ruby',
-            '.swift': 'swift',
-            '.kt': 'kotlin',
-            '.scala': 'scala',
-        }
+    def _read_window(
+        self, path: Path, line_number: int, context_lines: int
+    ) -> tuple[list[str], int] | None:
+        """
+        Read the lines around line_number from a memory-mapped file.
 
+        The window is located through the file's cached sparse line index,
+        so only the blocks holding its first and last lines are searched.
+
+        Returns the decoded lines and the 0-based index of the first one, or
+        None if the file looks binary.
+        """
+        first_line = max(1, line_number - context_lines)
+        line_count = line_number + context_lines - first_line + 1
+
+        with open(path, 'rb') as f, mmap.mmap(
+            f.fileno(), 0, access=mmap.ACCESS_READ
+        ) as mm:
+            if b'\x00' in mm[:1024]:
+                return None
+
+            stat = os.fstat(f.fileno())
+            index = _line_index(str(path), stat.st_mtime_ns, stat.st_size)
+            start = _line_offset(mm, index, first_line - 1)
+            end = _line_offset(mm, index, first_line - 1 + line_count)
+            lines = mm[start:end].decode('utf-8', errors='replace').splitlines()
+
+        return lines, first_line - 1
+
+    def detect_language(self, file_path: str) -> str | None:
+        """Detect programming language from file extension."""
         path = Path(file_path)
-        return ext_map.get(path.suffix.lower())
+        return _TUI_EXT_MAP.get(path.suffix.lower())
 
 
 class StatusBar(Static):
@@ -258,6 +367,8 @@ class SearchApp(App):
         self.results = results
         self.search_query = query  # Renamed to avoid conflict with App.query method
         self.repo_path = repo_path
+        # Clipboard backend, resolved once in the background after mount
+        self._clip_copy: Callable[[str], None] | None = None
 
     def compose(self) -> ComposeResult:
         """Create the app layout."""
@@ -280,6 +391,37 @@ class SearchApp(App):
         self.update_preview()
         self.update_status()
 
+        # Probe for xclip/xsel/pbcopy off the UI thread so the first copy is instant
+        self.run_worker(self._resolve_clipboard, thread=True)
+
+        # Import Pygments lexers for every language in the results up front,
+        # so moving to a new file type doesn't stall its first preview
+        preview = self.query_one("#file-preview", FilePreview)
+        languages = {
+            preview.detect_language(result.file_path) for result in self.results
+        }
+        self.run_worker(partial(self._warm_lexers, languages), thread=True)
+
+    def _warm_lexers(self, languages: set[str | None]) -> None:
+        """Resolve and cache the lexer for each language in the results."""
+        for language in languages:
+            if language:
+                cached_lexer(language)
+
+    def _resolve_clipboard(self) -> None:
+        """Resolve pyperclip's clipboard backend once and keep its copy function."""
+        try:
+            copy, _paste = pyperclip.determine_clipboard()
+        except Exception:
+            # Fall back to pyperclip.copy, which reports the problem on use
+            return
+        self._clip_copy = copy
+
+    def _copy_to_clipboard(self, text: str) -> None:
+        """Copy text using the resolved backend, or pyperclip's lazy default."""
+        copy = self._clip_copy or pyperclip.copy
+        copy(text)
+
     def on_data_table_row_highlighted(self, _event: DataTable.RowHighlighted) -> None:
         """Handle row selection changes."""
         self.update_preview()
@@ -299,7 +441,7 @@ class SearchApp(App):
         table = self.query_one("#results-table", SearchResultsTable)
         status_bar = self.query_one("#status-bar", StatusBar)
 
-        selected_count = len(table.selected_rows)
+        selected_count = table.selected_count
         current_index = table.cursor_row
         total_count = len(self.results)
 
@@ -334,7 +476,7 @@ class SearchApp(App):
         clipboard_content = self._format_results_for_clipboard(selected_results)
 
         try:
-            pyperclip.copy(clipboard_content)
+            self._copy_to_clipboard(clipboard_content)
             count = len(selected_results)
             self.notify(f"Copied {count} result{'s' if count > 1 else ''} to clipboard", severity="information")
         except Exception as e:
@@ -350,7 +492,7 @@ class SearchApp(App):
             return
 
         try:
-            pyperclip.copy(current_result.line_content.strip())
+            self._copy_to_clipboard(current_result.line_content.strip())
             self.notify("Yanked current line to clipboard", severity="information")
         except Exception as e:
             self.notify(f"Failed to copy to clipboard: {str(e)}", severity="error")
@@ -0,0 +1,411 @@
+"""
+Shared pytest fixtures for the KodeKlip test suite.
+
+Temporary files go through pytest's tmp_path machinery. When TMPDIR is
+unset and /dev/shm is a writable tmpfs, the suite points TMPDIR there so
+database and clone I/O stays in RAM; set TMPDIR (or --basetemp) to choose
+another location.
+
+The suite runs under pytest-xdist (-n auto --dist=loadgroup, see
+pyproject.toml): tests are spread across workers one by one, except those
+sharing an xdist_group, which stay together.
+"""
+
+import functools
+import os
+import shutil
+import socket
+import sqlite3
+import subprocess
+import tempfile
+from collections.abc import Callable, Iterator
+from contextlib import closing, contextmanager
+from pathlib import Path
+
+import click
+import pytest
+from click.testing import CliRunner
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+from typer.main import get_command
+
+from kodeklip import database, git_manager, repository_manager, schema
+from kodeklip.database import StrPath, create_db_and_tables
+from kodeklip.main import app
+from kodeklip.repository_manager import add_repository
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    parser.addoption(
+        "--run-network",
+        action="store_true",
+        default=False,
+        help="run tests marked 'network' (they clone from GitHub)",
+    )
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    """Default temporary files to /dev/shm when it is available."""
+    if config.getoption("basetemp") or "TMPDIR" in os.environ:
+        return
+    shm = Path("/dev/shm")
+    if shm.is_dir() and os.access(shm, os.W_OK):
+        # Set before xdist starts its workers, so they and git inherit it
+        os.environ["TMPDIR"] = str(shm)
+        tempfile.tempdir = None
+
+
+def _network_enabled(config: pytest.Config) -> bool:
+    """Whether the run opted in to GitHub access."""
+    return bool(
+        config.getoption("--run-network")
+        or os.environ.get("RUN_NETWORK_TESTS") == "1"
+    )
+
+
+def pytest_collection_modifyitems(
+    config: pytest.Config, items: list[pytest.Item]
+) -> None:
+    """
+    Skip network tests unless --run-network or RUN_NETWORK_TESTS=1 is given.
+
+    Opted-in network tests are still skipped when github.com can't be
+    reached, instead of each one waiting for a connection timeout.
+    """
+    network_items = [item for item in items if "network" in item.keywords]
+    if not network_items:
+        return
+    if _network_enabled(config):
+        if _github_reachable():
+            return
+        skip_network = pytest.mark.skip(reason="github.com is unreachable")
+    else:
+        skip_network = pytest.mark.skip(
+            reason="needs network; use --run-network or RUN_NETWORK_TESTS=1"
+        )
+    for item in network_items:
+        item.add_marker(skip_network)
+
+
+@functools.cache
+def _github_reachable() -> bool:
+    """Whether github.com accepts HTTPS connections, probed once per process."""
+    try:
+        socket.create_connection(("github.com", 443), timeout=1).close()
+    except OSError:
+        return False
+    return True
+
+
+@pytest.fixture(scope="session", autouse=True)
+def kodeklip_home(tmp_path_factory: pytest.TempPathFactory):
+    """
+    Point KodeKlip's home (and its repos/ dir) at a temp dir.
+
+    The default database is in-memory; tests that pass their own db_path
+    still get that file. Tests using `db_session` run in a rolled-back
+    transaction on a shared copy of the schema, and tests using `db_engine`
+    get a copy of their own.
+
+    Clones made by `kk add` are also partial, shallow and left without a
+    working tree; the tests only check that cloning succeeded, not the
+    history or the files. Tests that need files use `added_repo`.
+
+    tmp_path_factory is per xdist worker, so parallel workers never share a
+    database row or clone directory and tests can reuse the same aliases.
+    """
+    db_path = tmp_path_factory.mktemp("kodeklip") / "db.sqlite"
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("KODEKLIP_DB_PATH", str(db_path))
+        mp.setenv("KODEKLIP_DATABASE_URL", "sqlite://")
+        mp.setenv("KODEKLIP_CLONE_FILTER", "blob:none")
+        mp.setenv("KODEKLIP_CLONE_DEPTH", "1")
+        mp.setenv("KODEKLIP_CLONE_NO_CHECKOUT", "1")
+        # Test databases are throwaway; skip fsync on commit
+        mp.setenv("KODEKLIP_DISABLE_FSYNC", "1")
+        # Keep git hermetic: no user/system config, never prompt for credentials
+        mp.setenv("GIT_CONFIG_GLOBAL", os.devnull)
+        mp.setenv("GIT_CONFIG_SYSTEM", os.devnull)
+        mp.setenv("GIT_TERMINAL_PROMPT", "0")
+        mp.setenv("GIT_ASKPASS", "true")
+        yield db_path
+
+
+@pytest.fixture(scope="session")
+def schema_db(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """Database file with the KodeKlip schema, created once per session."""
+    template = tmp_path_factory.mktemp("schema") / "template.db"
+    create_db_and_tables(template)
+    database._dispose_engine(database.DatabaseConfig(template).database_url)
+    return template
+
+
+def _copy_database(source: Path, target: Path) -> None:
+    """
+    Copy a SQLite database with the backup API.
+
+    A plain file copy could miss pages still in the source's WAL file.
+    """
+    with (
+        closing(sqlite3.connect(source)) as src,
+        closing(sqlite3.connect(target)) as dst,
+    ):
+        src.backup(dst)
+
+
+@pytest.fixture(scope="session")
+def shared_db_url(
+    schema_db: Path, tmp_path_factory: pytest.TempPathFactory
+) -> str:
+    """URL of the database that `db_session` tests share, one per worker."""
+    path = tmp_path_factory.mktemp("shared") / "db.sqlite"
+    _copy_database(schema_db, path)
+    return database.DatabaseConfig(path).database_url
+
+
+@pytest.fixture
+def test_home(
+    tmp_path_factory: pytest.TempPathFactory, monkeypatch: pytest.MonkeyPatch
+) -> Path:
+    """
+    Point KodeKlip's home at a fresh temp dir for one test.
+
+    Clones made under its repos/ are left to pytest's temp-dir retention.
+    """
+    home = tmp_path_factory.mktemp("kodeklip")
+    monkeypatch.setenv("KODEKLIP_DB_PATH", str(home / "db.sqlite"))
+    return home
+
+
+@pytest.fixture
+def db_engine(
+    test_home: Path, schema_db: Path, monkeypatch: pytest.MonkeyPatch
+) -> Iterator[Engine]:
+    """
+    Give the test a database file of its own, copied from the schema template.
+
+    For tests whose code reaches the database from worker threads
+    (search_all_repositories does): the engine is an ordinary pooled one,
+    where a shared Connection wouldn't be thread-safe. It is disposed after
+    the test.
+    """
+    _copy_database(schema_db, test_home / "db.sqlite")
+    monkeypatch.delenv("KODEKLIP_DATABASE_URL")
+    config = database.DatabaseConfig()
+    try:
+        yield database.get_engine()
+    finally:
+        database._dispose_engine(config.database_url)
+
+
+# Modules that open their sessions through database.get_session
+_SESSION_MODULES = (database, git_manager, repository_manager, schema)
+
+
+@pytest.fixture
+def db_session(
+    test_home: Path, shared_db_url: str, monkeypatch: pytest.MonkeyPatch
+) -> Iterator[Session]:
+    """
+    Run a test inside one transaction on the shared database, rolled back after.
+
+    The test's default database (in `test_home`) resolves to the worker's
+    shared copy of the schema template. get_session is patched to bind its
+    sessions for that database to one connection with an open transaction;
+    each session works in a SAVEPOINT, so their commits never outlive the
+    test. Sessions on any other db_path are opened as usual. Yields a session
+    on that connection.
+
+    Only for single-threaded tests: the sessions share that Connection.
+    Code that opens Session(get_engine()) itself, like the searcher, doesn't
+    join the transaction; search tests use `db_engine`.
+    """
+    default_path = test_home / "db.sqlite"
+    monkeypatch.setenv("KODEKLIP_DATABASE_URL", shared_db_url)
+    connection = database.get_engine().connect()
+    transaction = connection.begin()
+    # pysqlite defers BEGIN until the first write; without it, releasing the
+    # first SAVEPOINT would commit
+    connection.exec_driver_sql("BEGIN")
+    real_get_session = database.get_session
+
+    @contextmanager
+    def get_session(db_path: StrPath | None = None) -> Iterator[Session]:
+        if db_path is not None and Path(db_path) != default_path:
+            with real_get_session(db_path) as session:
+                yield session
+        else:
+            with Session(
+                bind=connection, join_transaction_mode="create_savepoint"
+            ) as session:
+                yield session
+
+    for module in _SESSION_MODULES:
+        monkeypatch.setattr(module, "get_session", get_session)
+    try:
+        with get_session() as session:
+            yield session
+    finally:
+        transaction.rollback()
+        connection.close()
+
+
+@pytest.fixture(scope="session")
+def runner() -> CliRunner:
+    """One CliRunner shared by every CLI test."""
+    return CliRunner()
+
+
+@pytest.fixture(scope="session")
+def cli() -> click.Command:
+    """
+    KodeKlip's Click command, built once per session.
+
+    typer.testing.CliRunner rebuilds the command tree from the Typer app on
+    every invoke; tests invoke this prebuilt command with Click's runner.
+    """
+    return get_command(app)
+
+
+HELLO_WORLD_URL = "https://github.com/octocat/Hello-World.git"
+
+
+def _git(*args: str) -> None:
+    """Run a git command quietly, raising on failure."""
+    subprocess.run(["git", *args], check=True, capture_output=True, timeout=120)
+
+
+def _seed_hello_world(bare: Path) -> None:
+    """Build a local stand-in for octocat/Hello-World."""
+    work = bare.parent / "Hello-World-seed"
+    _git("init", "-q", str(work))
+    (work / "README").write_text("Hello World!\n")
+    _git("-C", str(work), "add", "README")
+    _git(
+        "-C", str(work),
+        "-c", "user.name=The Octocat",
+        "-c", "user.email=octocat@nowhere.com",
+        "commit", "-q", "-m", "first commit",
+    )
+    _git("clone", "-q", "--bare", str(work), str(bare))
+
+
+def _publish_mirror(
+    tmp_path_factory: pytest.TempPathFactory, bare: Path, fetch: bool
+) -> None:
+    """
+    Build the Hello-World mirror in a staging dir and rename it to `bare`.
+
+    With fetch, the real repository is cloned if GitHub can be reached;
+    otherwise (or if that fails) the mirror is seeded locally.
+    """
+    staging = tmp_path_factory.mktemp("mirror-staging") / "Hello-World.git"
+    cloned = False
+    if fetch and _github_reachable():
+        try:
+            _git("clone", "-q", "--bare", HELLO_WORLD_URL, str(staging))
+            cloned = True
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
+            shutil.rmtree(staging, ignore_errors=True)
+    if not cloned:
+        _seed_hello_world(staging)
+    # Let partial clones of the mirror filter on the server side
+    _git("-C", str(staging), "config", "uploadpack.allowFilter", "true")
+
+    bare.parent.mkdir(exist_ok=True)
+    try:
+        staging.rename(bare)
+    except OSError:
+        # Another worker published its mirror first
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def hello_world_mirror(
+    request: pytest.FixtureRequest, tmp_path_factory: pytest.TempPathFactory
+) -> Iterator[str]:
+    """
+    Local bare mirror of octocat/Hello-World, created once per session.
+
+    Tests clone from the returned file:// URL instead of hitting GitHub on
+    every `kk add`. The mirror is a locally seeded copy with the same README,
+    so the default run stays offline; runs that opt in to network tests
+    (--run-network or RUN_NETWORK_TESTS=1) fetch the real repository once.
+    It is deliberately neither shallow nor a --filter=blob:none partial
+    clone: git won't use a shallow repository as a clone reference, and
+    clones made from a partial mirror would fetch their missing blobs from
+    GitHub again. Clones *from* the mirror are partial instead (see
+    kodeklip_home), and borrow its objects via KODEKLIP_CLONE_REFERENCE.
+
+    Under xdist the mirror lives in the session's shared temp dir. A worker
+    that finds none builds its own and renames it into place; the rename is
+    atomic, so the first one wins and later workers reuse it.
+    """
+    root = tmp_path_factory.getbasetemp()
+    if os.environ.get("PYTEST_XDIST_WORKER"):
+        root = root.parent
+    bare = root / "mirror" / "Hello-World.git"
+    if not bare.is_dir():
+        _publish_mirror(tmp_path_factory, bare, _network_enabled(request.config))
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("KODEKLIP_CLONE_REFERENCE", str(bare))
+        yield f"file://{bare}"
+
+
+@pytest.fixture(scope="session")
+def hello_world_checkout(
+    hello_world_mirror: str, tmp_path_factory: pytest.TempPathFactory
+) -> Path:
+    """Working clone of the mirror, made once and copied by `added_repo`."""
+    checkout = tmp_path_factory.mktemp("checkout") / "Hello-World"
+    _git("clone", "-q", hello_world_mirror, str(checkout))
+    return checkout
+
+
+@pytest.fixture
+def register_hello_world(
+    hello_world_mirror: str, hello_world_checkout: Path
+) -> Callable[[str], Path]:
+    """
+    Return a function that registers Hello-World as if `kk add` had cloned it.
+
+    The session checkout is copied into repos/ rather than cloned again; its
+    origin is still the mirror, so `kk update` works. The function takes the
+    alias and returns the local path. It uses whichever database the test set
+    up (`db_session` or `db_engine`), so request one of those too.
+    """
+
+    def register(alias: str) -> Path:
+        local_path = git_manager.GitRepository()._get_local_path(alias)
+        shutil.copytree(hello_world_checkout, local_path, symlinks=True)
+        add_repository(alias, hello_world_mirror, str(local_path))
+        return local_path
+
+    return register
+
+
+@pytest.fixture
+def added_repo(register_hello_world: Callable[[str], Path]) -> str:
+    """Register a Hello-World repository for CLI tests. Returns the alias."""
+    alias = "hello-world-added"
+    register_hello_world(alias)
+    return alias
+
+
+@pytest.fixture
+def fake_git(monkeypatch: pytest.MonkeyPatch) -> list[tuple[str, Path]]:
+    """
+    Replace `git clone` with a fake that only creates the destination's .git dir.
+
+    For tests that check CLI output and exit codes but never the cloned
+    files. Returns the list of (url, path) pairs that were "cloned".
+    """
+    clones: list[tuple[str, Path]] = []
+
+    def clone_from(url, to_path, **_kwargs):
+        path = Path(to_path)
+        (path / ".git").mkdir(parents=True)
+        clones.append((url, path))
+
+    monkeypatch.setattr(git_manager.Repo, "clone_from", clone_from)
+    return clones
@@ -1,43 +1,27 @@
 """
 Tests for git_manager module using real repositories.
 
-Tests git operations with actual public GitHub repositories to ensure
-the implementation works correctly with real data.
+Tests git operations with real clones of a local mirror of a public GitHub
+repository (see the hello_world_mirror fixture); only the public-clone smoke
+test goes to GitHub itself.
 """
 
-import shutil
-import tempfile
-from pathlib import Path
-
 import pytest
-from sqlmodel import Session
+from git import GitCommandError, Repo
 
-from kodeklip.database import DatabaseConfig, get_session, create_db_and_tables
-from kodeklip.git_manager import GitRepository
-from kodeklip.models import Repository
+from kodeklip.git_manager import (
+    GitRepository,
+    _clone_options,
+    validate_repository_url,
+)
 
 
-class TestGitRepository:
-    """Test GitRepository class with real git operations."""
+class TestValidateRepositoryUrl:
+    """Test URL validation, which needs no database or clone."""
 
-    @pytest.fixture
-    def temp_db_dir(self):
-        """Create temporary directory for test database."""
-        temp_dir = tempfile.mkdtemp()
-        yield temp_dir
-        shutil.rmtree(temp_dir, ignore_errors=True)
-
-    @pytest.fixture
-    def git_manager(self, temp_db_dir):
-        """Create GitRepository instance with temporary database."""
-        db_path = Path(temp_db_dir) / "test.db"
-        # Initialize database tables
-        create_db_and_tables(str(db_path))
-        return GitRepository(str(db_path))
-
-    def test_validate_repository_url_valid_urls(self, git_manager):
-        """Test URL validation with valid repository URLs."""
-        valid_urls = [
+    @pytest.mark.parametrize(
+        "url",
+        [
             "https://github.com/octocat/Hello-World.git",
             "https://github.com/octocat/Hello-World",
             "git@github.com:octocat/Hello-World.git",
@@ -47,14 +31,16 @@ class TestGitRepository:
             "git@gitlab.com:gitlab-org/gitlab.git",
             "https://bitbucket.org/atlassian/bitbucket.git",
             "git@bitbucket.org:atlassian/bitbucket.git",
-        ]
-
-        for url in valid_urls:
-            assert git_manager.validate_repository_url(url), f"URL should be valid: {url}"
+            "file:///tmp/mirrors/Hello-World.git",
+        ],
+    )
+    def test_valid_urls(self, url):
+        """Test URL validation with valid repository URLs."""
+        assert validate_repository_url(url)
 
-    def test_validate_repository_url_invalid_urls(self, git_manager):
-        """Test URL validation with invalid repository URLs."""
-        invalid_urls = [
+    @pytest.mark.parametrize(
+        "url",
+        [
             "",
             None,
             "not-a-url",
@@ -64,50 +50,110 @@ class TestGitRepository:
             "https://github.com/user",
             "ftp://github.com/user/repo.git",
             "https://github.com/user/repo/with/extra/path",
-        ]
+        ],
+    )
+    def test_invalid_urls(self, url):
+        """Test URL validation with invalid repository URLs."""
+        assert not validate_repository_url(url)
+
+    def test_method_matches_function(self, tmp_path):
+        """Test GitRepository.validate_repository_url delegates to the function."""
+        git_manager = GitRepository(tmp_path / "test.db")
+        assert git_manager.validate_repository_url("git@github.com:a/b.git")
+        assert not git_manager.validate_repository_url("not-a-url")
+
+
+class TestCloneOptions:
+    """Test the clone options read from the environment."""
 
-        for url in invalid_urls:
-            assert not git_manager.validate_repository_url(url), f"URL should be invalid: {url}"
+    @pytest.fixture(autouse=True)
+    def _clear_env(self, monkeypatch):
+        """Start every test from unset clone variables."""
+        for name in (
+            "KODEKLIP_CLONE_FILTER",
+            "KODEKLIP_CLONE_DEPTH",
+            "KODEKLIP_CLONE_NO_CHECKOUT",
+            "KODEKLIP_CLONE_REFERENCE",
+        ):
+            monkeypatch.delenv(name, raising=False)
 
+    def test_unset_clones_are_full(self):
+        """Test no variables means no extra clone options."""
+        assert _clone_options() == {}
+
+    def test_filter_does_not_imply_depth(self, monkeypatch):
+        """Test a partial clone keeps its full history unless a depth is set."""
+        monkeypatch.setenv("KODEKLIP_CLONE_FILTER", "blob:none")
+        assert _clone_options() == {"filter": "blob:none"}
+
+        monkeypatch.setenv("KODEKLIP_CLONE_DEPTH", "1")
+        assert _clone_options() == {"filter": "blob:none", "depth": 1}
+
+    @pytest.mark.parametrize("depth", ["0", "-1", "one", ""])
+    def test_invalid_depth_ignored(self, monkeypatch, depth):
+        """Test a depth that isn't a positive number leaves clones full."""
+        monkeypatch.setenv("KODEKLIP_CLONE_DEPTH", depth)
+        assert _clone_options() == {}
+
+
+@pytest.mark.usefixtures("db_session")
+class TestGitRepository:
+    """Test GitRepository class with real git operations."""
+
+    @pytest.fixture
+    def git_manager(self):
+        """
+        Create GitRepository instance in the test's own KodeKlip home.
+
+        Its database is db_session's: every instance shares the worker's
+        engine and the test's rows are rolled back. Clones made under repos/
+        are left to pytest's temp-dir retention.
+        """
+        return GitRepository()
+
+    @pytest.mark.network
     def test_clone_real_public_repository(self, git_manager):
         """Test cloning a real public GitHub repository."""
         # Use a small, stable public repository for testing
         test_url = "https://github.com/octocat/Hello-World.git"
         test_alias = "hello-world-test"
 
-        # Ensure clean state
         local_path = git_manager._get_local_path(test_alias)
-        if local_path.exists():
-            shutil.rmtree(local_path)
 
         # Test cloning
         success, message, repo_record = git_manager.clone_repository(test_url, test_alias)
 
-        try:
-            assert success, f"Clone should succeed: {message}"
-            assert "Successfully cloned" in message
-            assert repo_record is not None
-            assert repo_record.alias == test_alias
-            assert repo_record.url == test_url
-            assert local_path.exists()
-            assert (local_path / ".git").exists()
-
-            # Verify repository exists in database
-            assert git_manager.repository_exists(test_alias)
-
-            # Verify we can get repository info
-            repo_info = git_manager.get_repository_info(test_alias)
-            assert repo_info is not None
-            assert repo_info.alias == test_alias
-
-        finally:
-            # Cleanup
-            if local_path.exists():
-                shutil.rmtree(local_path, ignore_errors=True)
-
-    def test_clone_invalid_repository(self, git_manager):
+        assert success, f"Clone should succeed: {message}"
+        assert "Successfully cloned" in message
+        assert repo_record is not None
+        assert repo_record.alias == test_alias
+        assert repo_record.url == test_url
+        assert local_path.exists()
+        assert (local_path / ".git").exists()
+
+        # Verify repository exists in database
+        assert git_manager.repository_exists(test_alias)
+
+        # Verify we can get repository info
+        repo_info = git_manager.get_repository_info(test_alias)
+        assert repo_info is not None
+        assert repo_info.alias == test_alias
+
+    def test_clone_borrows_reference_objects(self, git_manager, hello_world_mirror):
+        """Test clones share the mirror's objects via KODEKLIP_CLONE_REFERENCE."""
+        success, message, _ = git_manager.clone_repository(
+            hello_world_mirror, "reference-test"
+        )
+        assert success, f"Clone should succeed: {message}"
+
+        local_path = git_manager._get_local_path("reference-test")
+        alternates = local_path / ".git" / "objects" / "info" / "alternates"
+        mirror = hello_world_mirror.removeprefix("file://")
+        assert alternates.read_text().strip() == f"{mirror}/objects"
+
+    def test_clone_invalid_repository(self, git_manager, tmp_path):
         """Test cloning with invalid repository URL."""
-        invalid_url = "https://github.com/nonexistent/nonexistent-repo-12345.git"
+        invalid_url = f"file://{tmp_path}/nonexistent-repo-12345.git"
         test_alias = "invalid-repo-test"
 
         success, message, repo_record = git_manager.clone_repository(invalid_url, test_alias)
@@ -123,95 +169,94 @@ class TestGitRepository:
         # Ensure no database record was created
         assert not git_manager.repository_exists(test_alias)
 
-    def test_clone_duplicate_alias(self, git_manager):
+    @pytest.mark.parametrize(
+        "stderr, hint",
+        [
+            ("remote: Repository not found.", "may not exist"),
+            ("fatal: Authentication failed for 'https://github.com/x/y'", "SSH keys"),
+            ("fatal: unable to access: Network is unreachable", "Network error"),
+        ],
+    )
+    def test_clone_failure_hints(self, git_manager, monkeypatch, stderr, hint):
+        """Test git's clone errors are reported with a matching hint."""
+
+        def clone_from(url, _to_path, **_kwargs):
+            raise GitCommandError(["git", "clone", url], 128, stderr)
+
+        monkeypatch.setattr(Repo, "clone_from", clone_from)
+        test_url = "https://github.com/nonexistent/nonexistent-repo-12345.git"
+
+        success, message, repo_record = git_manager.clone_repository(
+            test_url, "hint-test"
+        )
+
+        assert not success
+        assert "clone failed" in message.lower()
+        assert hint in message
+        assert repo_record is None
+        assert not git_manager.repository_exists("hint-test")
+
+    def test_clone_duplicate_alias(self, git_manager, hello_world_mirror):
         """Test cloning with duplicate alias."""
-        test_url = "https://github.com/octocat/Hello-World.git"
+        test_url = hello_world_mirror
         test_alias = "duplicate-test"
 
         # First clone should succeed
         success1, message1, repo1 = git_manager.clone_repository(test_url, test_alias)
 
-        try:
-            assert success1, f"First clone should succeed: {message1}"
-
-            # Second clone with same alias should fail
-            success2, message2, repo2 = git_manager.clone_repository(test_url, test_alias)
+        assert success1, f"First clone should succeed: {message1}"
 
-            assert not success2, "Second clone with same alias should fail"
-            assert "already exists" in message2
-            assert repo2 is None
+        # Second clone with same alias should fail
+        success2, message2, repo2 = git_manager.clone_repository(test_url, test_alias)
 
-        finally:
-            # Cleanup
-            local_path = git_manager._get_local_path(test_alias)
-            if local_path.exists():
-                shutil.rmtree(local_path, ignore_errors=True)
+        assert not success2, "Second clone with same alias should fail"
+        assert "already exists" in message2
+        assert repo2 is None
 
-    def test_clone_invalid_alias(self, git_manager):
-        """Test cloning with invalid alias."""
+    @pytest.mark.parametrize("alias", ["", None, "   "])
+    def test_clone_invalid_alias(self, git_manager, alias):
+        """Test cloning with an empty, missing or whitespace-only alias."""
         test_url = "https://github.com/octocat/Hello-World.git"
 
-        # Test empty alias
-        success, message, repo = git_manager.clone_repository(test_url, "")
-        assert not success
-        assert "alias cannot be empty" in message.lower()
-
-        # Test None alias
-        success, message, repo = git_manager.clone_repository(test_url, None)
-        assert not success
-        assert "alias cannot be empty" in message.lower()
-
-        # Test whitespace-only alias
-        success, message, repo = git_manager.clone_repository(test_url, "   ")
+        success, message, repo = git_manager.clone_repository(test_url, alias)
         assert not success
         assert "alias cannot be empty" in message.lower()
+        assert repo is None
 
-    def test_clone_invalid_url(self, git_manager):
+    @pytest.mark.parametrize(
+        "invalid_url", ["not-a-url", "https://example.com", "", None]
+    )
+    def test_clone_invalid_url(self, git_manager, invalid_url):
         """Test cloning with invalid URL."""
-        invalid_urls = [
-            "not-a-url",
-            "https://example.com",
-            "",
-            None,
-        ]
+        success, message, repo = git_manager.clone_repository(invalid_url, "test-alias")
+        assert not success, f"Should fail for invalid URL: {invalid_url}"
+        assert "invalid repository url" in message.lower()
+        assert repo is None
 
-        for invalid_url in invalid_urls:
-            success, message, repo = git_manager.clone_repository(invalid_url, "test-alias")
-            assert not success, f"Should fail for invalid URL: {invalid_url}"
-            assert "invalid repository url" in message.lower()
-            assert repo is None
-
-    def test_list_repositories(self, git_manager):
+    def test_list_repositories(self, git_manager, hello_world_mirror):
         """Test listing repositories."""
         # Initially should be empty
         repos = git_manager.list_repositories()
         initial_count = len(repos)
 
         # Clone a test repository
-        test_url = "https://github.com/octocat/Hello-World.git"
+        test_url = hello_world_mirror
         test_alias = "list-test"
 
         success, message, repo = git_manager.clone_repository(test_url, test_alias)
 
-        try:
-            assert success, f"Clone should succeed: {message}"
-
-            # List should now include our repository
-            repos = git_manager.list_repositories()
-            assert len(repos) == initial_count + 1
+        assert success, f"Clone should succeed: {message}"
 
-            # Find our repository in the list
-            our_repo = next((r for r in repos if r.alias == test_alias), None)
-            assert our_repo is not None
-            assert our_repo.url == test_url
+        # List should now include our repository
+        repos = git_manager.list_repositories()
+        assert len(repos) == initial_count + 1
 
-        finally:
-            # Cleanup
-            local_path = git_manager._get_local_path(test_alias)
-            if local_path.exists():
-                shutil.rmtree(local_path, ignore_errors=True)
+        # Find our repository in the list
+        our_repo = next((r for r in repos if r.alias == test_alias), None)
+        assert our_repo is not None
+        assert our_repo.url == test_url
 
-    def test_repository_exists(self, git_manager):
+    def test_repository_exists(self, git_manager, hello_world_mirror):
         """Test repository existence checking."""
         test_alias = "exists-test"
 
@@ -219,25 +264,18 @@ class TestGitRepository:
         assert not git_manager.repository_exists(test_alias)
 
         # Clone repository
-        test_url = "https://github.com/octocat/Hello-World.git"
+        test_url = hello_world_mirror
         success, message, repo = git_manager.clone_repository(test_url, test_alias)
 
-        try:
-            assert success, f"Clone should succeed: {message}"
-
-            # Should exist after cloning
-            assert git_manager.repository_exists(test_alias)
+        assert success, f"Clone should succeed: {message}"
 
-            # Should still exist if we just check again
-            assert git_manager.repository_exists(test_alias)
+        # Should exist after cloning
+        assert git_manager.repository_exists(test_alias)
 
-        finally:
-            # Cleanup
-            local_path = git_manager._get_local_path(test_alias)
-            if local_path.exists():
-                shutil.rmtree(local_path, ignore_errors=True)
+        # Should still exist if we just check again
+        assert git_manager.repository_exists(test_alias)
 
-    def test_get_repository_info(self, git_manager):
+    def test_get_repository_info(self, git_manager, hello_world_mirror):
         """Test getting repository information."""
         test_alias = "info-test"
 
@@ -246,21 +284,14 @@ class TestGitRepository:
         assert info is None
 
         # Clone repository
-        test_url = "https://github.com/octocat/Hello-World.git"
+        test_url = hello_world_mirror
         success, message, repo = git_manager.clone_repository(test_url, test_alias)
 
-        try:
-            assert success, f"Clone should succeed: {message}"
-
-            # Should return repository info
-            info = git_manager.get_repository_info(test_alias)
-            assert info is not None
-            assert info.alias == test_alias
-            assert info.url == test_url
-            assert info.indexed is False
-
-        finally:
-            # Cleanup
-            local_path = git_manager._get_local_path(test_alias)
-            if local_path.exists():
-                shutil.rmtree(local_path, ignore_errors=True)
\ No newline at end of file
+        assert success, f"Clone should succeed: {message}"
+
+        # Should return repository info
+        info = git_manager.get_repository_info(test_alias)
+        assert info is not None
+        assert info.alias == test_alias
+        assert info.url == test_url
+        assert info.indexed is False
\ No newline at end of file
@@ -2,57 +2,138 @@
 Comprehensive tests for search functionality using real repositories.
 
 Tests all search capabilities with actual git repositories and real data.
+Tests of the Python side of searching answer ripgrep calls with canned
+output instead (see `mock_ripgrep`).
 """
 
-import shutil
-import tempfile
+import io
+import subprocess
+import types
+from collections.abc import Iterator
 from pathlib import Path
-from typing import List
 
+import orjson
 import pytest
-from typer.testing import CliRunner
 
+from kodeklip import main, search
 from kodeklip.database import create_db_and_tables
-from kodeklip.main import app
-from kodeklip.search import RipgrepSearcher, SearchOptions, SearchResult
-
-
+from kodeklip.repository_manager import add_repositories
+from kodeklip.search import (
+    DiskSearchCache,
+    RipgrepSearcher,
+    SearchCache,
+    SearchOptions,
+    SearchResult,
+)
+
+
+def _rg_event(event_type: str, **data) -> bytes:
+    return orjson.dumps({'type': event_type, 'data': data})
+
+
+def _rg_match(line_number: int, line: str) -> bytes:
+    return _rg_event(
+        'match',
+        path={'text': 'README'},
+        lines={'text': line},
+        line_number=line_number,
+        absolute_offset=0,
+        submatches=[{'match': {'text': 'Hello'}, 'start': 0, 'end': 5}],
+    )
+
+
+# What `rg --json Hello` prints for a README with two matching lines
+FAKE_JSON = b'\n'.join([
+    _rg_event('begin', path={'text': 'README'}),
+    _rg_match(1, 'Hello World!\n'),
+    _rg_match(3, 'Hello again\n'),
+    _rg_event('end', path={'text': 'README'}, stats={}),
+]) + b'\n'
+
+
+class _FakeRipgrep:
+    """Stands in for the Popen'd ripgrep process, printing FAKE_JSON."""
+
+    def __init__(self, args, **_kwargs):
+        self.args = args
+        self.stdout = io.BytesIO(FAKE_JSON)
+        self.stderr = io.BytesIO(b'')
+        self.returncode = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def terminate(self) -> None:
+        pass
+
+
+@pytest.fixture
+def mock_ripgrep(monkeypatch: pytest.MonkeyPatch) -> Iterator[list[list[str]]]:
+    """
+    Answer every ripgrep call with canned output instead of running rg.
+
+    For tests of the Python side of searching (caching, formatting, result
+    handling); tests of ripgrep's own matching and filtering still run it.
+    Returns the list of command lines the searcher would have run.
+    """
+    commands: list[list[str]] = []
+
+    def popen(args, **kwargs):
+        commands.append(args)
+        return _FakeRipgrep(args, **kwargs)
+
+    def run(args, **_kwargs):
+        commands.append(args)
+        return subprocess.CompletedProcess(args, 0, stdout=b'ripgrep 14.1.0\n')
+
+    # Swap search's view of subprocess only; git calls elsewhere still run
+    fake_subprocess = types.SimpleNamespace(
+        Popen=popen, run=run, PIPE=subprocess.PIPE
+    )
+    monkeypatch.setattr(search, 'subprocess', fake_subprocess)
+    monkeypatch.setattr(search, '_detect_rg_path', lambda: '/usr/bin/rg')
+    # Don't let the fake's answer outlive the test, or a real one leak in
+    search._ripgrep_works.cache_clear()
+    yield commands
+    search._ripgrep_works.cache_clear()
+
+
+@pytest.mark.usefixtures("db_engine")
 class TestSearchFunctionality:
     """Test search functionality with real repositories."""
 
-    def setup_method(self):
-        """Set up test environment with temporary database and CLI runner."""
-        self.temp_dir = tempfile.mkdtemp()
-        self.runner = CliRunner()
-
-    def teardown_method(self):
-        """Clean up test environment."""
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    @pytest.fixture(autouse=True)
+    def _setup(self, runner, cli, register_hello_world, tmp_path, monkeypatch):
+        """Set up test environment with CLI runner, inside this test's tmp_path."""
+        monkeypatch.chdir(tmp_path)
+        self.runner = runner
+        self.cli = cli
+        self.register_hello_world = register_hello_world
 
     def _setup_test_repos(self) -> None:
-        """Set up test repositories for search testing."""
-        with self.runner.isolated_filesystem():
-            # Add small test repository
-            result = self.runner.invoke(app, [
-                'add',
-                'https://github.com/octocat/Hello-World.git',
-                'test-repo'
-            ])
-            assert result.exit_code == 0
-
-    def test_searcher_initialization(self):
+        """Register the Hello-World checkout as 'test-repo' for search testing."""
+        self.register_hello_world('test-repo')
+
+    def test_searcher_initialization(self, mock_ripgrep):
         """Test RipgrepSearcher initialization and validation."""
         searcher = RipgrepSearcher()
-        assert searcher.rg_path is not None
+        assert searcher.rg_path == '/usr/bin/rg'
         assert searcher.validate_ripgrep()
         assert searcher.cache is not None
         assert searcher.formatter is not None
 
+        # `rg --version` runs once per binary, not once per searcher
+        assert RipgrepSearcher().validate_ripgrep()
+        assert mock_ripgrep == [['/usr/bin/rg', '--version']]
+
     def test_search_options_creation(self):
         """Test SearchOptions with various configurations."""
         # Default options
         options = SearchOptions()
-        assert options.file_types == []
+        assert options.file_types == ()
         assert options.max_results == 1000
         assert options.smart_case is True
 
@@ -71,135 +152,159 @@ class TestSearchFunctionality:
         assert options.ignore_case is True
         assert options.max_results == 50
 
+    def test_fixed_strings_resolution(self):
+        """Test literal queries are sent to ripgrep as fixed strings."""
+        assert SearchOptions().use_fixed_strings('hello_world')
+        assert not SearchOptions().use_fixed_strings('class.*Error')
+        assert SearchOptions(regex_mode=False).use_fixed_strings('class.*Error')
+        assert not SearchOptions(fixed_strings=False).use_fixed_strings('hello')
+        assert SearchOptions(fixed_strings=True).use_fixed_strings('a+b')
+
     def test_basic_search_with_real_repo(self):
         """Test basic search functionality with real repository."""
-        with self.runner.isolated_filesystem():
-            self._setup_test_repos()
+        self._setup_test_repos()
 
-            searcher = RipgrepSearcher()
-            results = searcher.search_repository('test-repo', 'Hello')
+        searcher = RipgrepSearcher()
+        results = searcher.search_repository('test-repo', 'Hello')
 
-            assert isinstance(results, list)
-            assert len(results) > 0
+        assert isinstance(results, list)
+        assert len(results) > 0
 
-            # Check result structure
-            result = results[0]
-            assert isinstance(result, SearchResult)
-            assert hasattr(result, 'file_path')
-            assert hasattr(result, 'line_number')
-            assert hasattr(result, 'line_content')
-            assert 'Hello' in result.line_content
+        # Check result structure
+        result = results[0]
+        assert isinstance(result, SearchResult)
+        assert hasattr(result, 'file_path')
+        assert hasattr(result, 'line_number')
+        assert hasattr(result, 'line_content')
+        assert 'Hello' in result.line_content
 
     def test_file_type_filtering(self):
         """Test file type filtering functionality."""
-        with self.runner.isolated_filesystem():
-            self._setup_test_repos()
+        self._setup_test_repos()
 
-            searcher = RipgrepSearcher()
+        searcher = RipgrepSearcher()
 
-            # Search for markdown files only
-            options = SearchOptions(file_types=['md'], max_results=10)
-            md_results = searcher.search_repository('test-repo', 'Hello', options)
+        # Search for markdown files only
+        options = SearchOptions(file_types=['md'], max_results=10)
+        md_results = searcher.search_repository('test-repo', 'Hello', options)
 
-            # All results should be from markdown files or no results
-            for result in md_results:
-                assert result.file_extension.lower() in ['md', '']
+        # All results should be from markdown files or no results
+        for result in md_results:
+            assert result.file_extension.lower() in ['md', '']
 
     def test_context_lines(self):
         """Test context lines functionality."""
-        with self.runner.isolated_filesystem():
-            self._setup_test_repos()
+        self._setup_test_repos()
 
-            searcher = RipgrepSearcher()
-            options = SearchOptions(context_before=1, context_after=1)
-            results = searcher.search_repository('test-repo', 'Hello', options)
+        searcher = RipgrepSearcher()
+        options = SearchOptions(context_before=1, context_after=1)
+        results = searcher.search_repository('test-repo', 'Hello', options)
 
-            assert len(results) > 0
-            # Context lines are handled by ripgrep output parsing
+        assert len(results) > 0
+        # Context lines are handled by ripgrep output parsing
 
     def test_case_sensitivity(self):
         """Test case sensitivity options."""
-        with self.runner.isolated_filesystem():
-            self._setup_test_repos()
+        self._setup_test_repos()
 
-            searcher = RipgrepSearcher()
+        searcher = RipgrepSearcher()
 
-            # Case insensitive search
-            options_insensitive = SearchOptions(ignore_case=True)
-            results_insensitive = searcher.search_repository(
-                'test-repo', 'hello', options_insensitive
-            )
+        # Case insensitive search
+        options_insensitive = SearchOptions(ignore_case=True)
+        results_insensitive = searcher.search_repository(
+            'test-repo', 'hello', options_insensitive
+        )
 
-            # Should find matches regardless of case
-            assert len(results_insensitive) > 0
+        # Should find matches regardless of case
+        assert len(results_insensitive) > 0
 
-    def test_search_caching(self):
+    def test_search_caching(self, mock_ripgrep):
         """Test search result caching functionality."""
-        with self.runner.isolated_filesystem():
-            self._setup_test_repos()
+        self._setup_test_repos()
+
+        searcher = RipgrepSearcher(enable_cache=True)
+        options = SearchOptions(max_results=5)
+
+        # First search (cache miss)
+        results1 = searcher.search_repository('test-repo', 'Hello', options)
 
-            searcher = RipgrepSearcher(enable_cache=True)
-            options = SearchOptions(max_results=5)
+        # Second search (cache hit)
+        results2 = searcher.search_repository('test-repo', 'Hello', options)
 
-            # First search (cache miss)
-            results1 = searcher.search_repository('test-repo', 'Hello', options)
+        # Results should be identical
+        assert len(results1) == len(results2)
+        assert all(r1.line_content == r2.line_content
+                  for r1, r2 in zip(results1, results2))
 
-            # Second search (cache hit)
-            results2 = searcher.search_repository('test-repo', 'Hello', options)
+        # Verify cache is working
+        cache_key = searcher.cache._make_key('test-repo', 'Hello', options)
+        assert cache_key in searcher.cache.cache
+        assert len(mock_ripgrep) == 1
 
-            # Results should be identical
-            assert len(results1) == len(results2)
-            assert all(r1.line_content == r2.line_content
-                      for r1, r2 in zip(results1, results2))
+    def test_disk_cache_skips_modified_checkout(self):
+        """Test local edits are searched instead of served from the disk cache."""
+        local_path = self.register_hello_world('test-repo')
+        searcher = RipgrepSearcher(enable_cache=False, persist_cache=True)
+        options = SearchOptions()
+
+        results = searcher.search_repository('test-repo', 'Hello', options)
+        revision = search._read_head_sha(local_path)
+        assert searcher.disk_cache.get('test-repo', 'Hello', options, revision)
 
-            # Verify cache is working
-            cache_key = searcher.cache._make_key('test-repo', 'Hello', options)
-            assert cache_key in searcher.cache.cache
+        # Edit a tracked file
+        with (local_path / 'README').open('a') as readme:
+            readme.write('Hello again\n')
+        edited = searcher.search_repository('test-repo', 'Hello', options)
+        assert len(edited) == len(results) + 1
+
+        # Add an untracked file
+        (local_path / 'notes.txt').write_text('Hello from notes\n')
+        untracked = searcher.search_repository('test-repo', 'Hello', options)
+        assert len(untracked) == len(results) + 2
 
     def test_nonexistent_repository(self):
         """Test error handling for nonexistent repository."""
-        with self.runner.isolated_filesystem():
-            create_db_and_tables()  # Initialize database
+        create_db_and_tables()  # Initialize database
 
-            searcher = RipgrepSearcher()
+        searcher = RipgrepSearcher()
 
-            with pytest.raises(ValueError, match="Repository 'nonexistent' not found"):
-                searcher.search_repository('nonexistent', 'test')
+        with pytest.raises(ValueError, match="Repository 'nonexistent' not found"):
+            searcher.search_repository('nonexistent', 'test')
 
+    @pytest.mark.usefixtures("mock_ripgrep")
     def test_search_all_repositories(self):
         """Test multi-repository search functionality."""
-        with self.runner.isolated_filesystem():
-            self._setup_test_repos()
+        self._setup_test_repos()
 
-            searcher = RipgrepSearcher()
-            options = SearchOptions(max_results=10)
+        searcher = RipgrepSearcher()
+        options = SearchOptions(max_results=10)
 
-            results_dict = searcher.search_all_repositories('Hello', options)
+        results_dict = searcher.search_all_repositories('Hello', options)
 
-            assert isinstance(results_dict, dict)
-            assert 'test-repo' in results_dict
-            assert len(results_dict['test-repo']) > 0
+        assert isinstance(results_dict, dict)
+        assert 'test-repo' in results_dict
+        assert len(results_dict['test-repo']) > 0
 
+    @pytest.mark.usefixtures("mock_ripgrep")
     def test_search_result_formatting(self):
         """Test search result formatting and rich output."""
-        with self.runner.isolated_filesystem():
-            self._setup_test_repos()
+        self._setup_test_repos()
 
-            searcher = RipgrepSearcher()
-            results = searcher.search_repository('test-repo', 'Hello')
+        searcher = RipgrepSearcher()
+        results = searcher.search_repository('test-repo', 'Hello')
 
-            # Test table formatting
-            table = searcher.formatter.format_results_table(results, 'Hello')
-            assert table is not None
+        # Test table formatting
+        table = searcher.formatter.format_results_table(results, 'Hello')
+        assert table is not None
 
-            # Test detailed formatting
-            panels = searcher.formatter.format_results_detailed(results, 'Hello')
-            assert isinstance(panels, list)
+        # Test detailed formatting
+        panels = list(searcher.formatter.format_results_detailed(results, 'Hello'))
+        assert len(panels) == min(len(results), 10)
 
-            # Test summary formatting
-            results_dict = {'test-repo': results}
-            summary = searcher.formatter.format_summary(results_dict, 'Hello')
-            assert summary is not None
+        # Test summary formatting
+        results_dict = {'test-repo': results}
+        summary = searcher.formatter.format_summary(results_dict, 'Hello')
+        assert summary is not None
 
     def test_search_result_methods(self):
         """Test SearchResult methods and properties."""
@@ -228,203 +333,275 @@ class TestSearchFunctionality:
         assert result_dict['context_after'] == ['    pass']
 
 
+@pytest.mark.usefixtures("db_engine")
 class TestCLIIntegration:
     """Test CLI integration with search functionality."""
 
-    def setup_method(self):
-        """Set up test environment."""
-        self.runner = CliRunner()
+    @pytest.fixture(autouse=True)
+    def _setup(self, runner, cli, register_hello_world, tmp_path, monkeypatch):
+        """Set up test environment, inside this test's tmp_path."""
+        monkeypatch.chdir(tmp_path)
+        self.runner = runner
+        self.cli = cli
+        self.register_hello_world = register_hello_world
 
     def _setup_test_repos(self) -> None:
-        """Set up test repositories."""
-        result = self.runner.invoke(app, [
-            'add',
-            'https://github.com/octocat/Hello-World.git',
-            'cli-test-repo'
-        ])
-        assert result.exit_code == 0
+        """Register the Hello-World checkout as 'cli-test-repo'."""
+        self.register_hello_world('cli-test-repo')
 
     def test_cli_basic_search(self):
         """Test basic CLI search command."""
-        with self.runner.isolated_filesystem():
-            self._setup_test_repos()
+        self._setup_test_repos()
 
-            result = self.runner.invoke(app, ['find', 'cli-test-repo', 'Hello'])
-            assert result.exit_code == 0
-            assert 'Found' in result.output
-            assert 'matches' in result.output
+        result = self.runner.invoke(self.cli, ['find', 'cli-test-repo', 'Hello'])
+        assert result.exit_code == 0
+        assert 'Found' in result.output
+        assert 'matches' in result.output
 
     def test_cli_file_type_filter(self):
         """Test CLI file type filtering."""
-        with self.runner.isolated_filesystem():
-            self._setup_test_repos()
+        self._setup_test_repos()
 
-            result = self.runner.invoke(app, [
-                'find', 'cli-test-repo', 'Hello', '-t', 'md', '--limit', '5'
-            ])
-            assert result.exit_code == 0
+        result = self.runner.invoke(self.cli, [
+            'find', 'cli-test-repo', 'Hello', '-t', 'md', '--limit', '5'
+        ])
+        assert result.exit_code == 0
 
     def test_cli_context_option(self):
         """Test CLI context lines option."""
-        with self.runner.isolated_filesystem():
-            self._setup_test_repos()
+        self._setup_test_repos()
 
-            result = self.runner.invoke(app, [
-                'find', 'cli-test-repo', 'Hello', '-c', '2'
-            ])
-            assert result.exit_code == 0
-            assert 'Context lines: 2' in result.output
+        result = self.runner.invoke(self.cli, [
+            'find', 'cli-test-repo', 'Hello', '-c', '2'
+        ])
+        assert result.exit_code == 0
+        assert 'Context lines: 2' in result.output
 
     def test_cli_limit_option(self):
         """Test CLI result limit option."""
-        with self.runner.isolated_filesystem():
-            self._setup_test_repos()
+        self._setup_test_repos()
 
-            result = self.runner.invoke(app, [
-                'find', 'cli-test-repo', 'Hello', '--limit', '10'
-            ])
-            assert result.exit_code == 0
-            assert 'Result limit: 10' in result.output
+        result = self.runner.invoke(self.cli, [
+            'find', 'cli-test-repo', 'Hello', '--limit', '10'
+        ])
+        assert result.exit_code == 0
+        assert 'Result limit: 10' in result.output
 
     def test_cli_detailed_output(self):
         """Test CLI detailed output option."""
-        with self.runner.isolated_filesystem():
-            self._setup_test_repos()
+        self._setup_test_repos()
 
-            result = self.runner.invoke(app, [
-                'find', 'cli-test-repo', 'Hello', '--detailed', '--limit', '1'
-            ])
-            assert result.exit_code == 0
+        result = self.runner.invoke(self.cli, [
+            'find', 'cli-test-repo', 'Hello', '--detailed', '--limit', '1'
+        ])
+        assert result.exit_code == 0
 
     def test_cli_case_sensitive(self):
         """Test CLI case sensitive option."""
-        with self.runner.isolated_filesystem():
-            self._setup_test_repos()
+        self._setup_test_repos()
 
-            result = self.runner.invoke(app, [
-                'find', 'cli-test-repo', 'hello', '--case-sensitive'
-            ])
-            assert result.exit_code == 0
+        result = self.runner.invoke(self.cli, [
+            'find', 'cli-test-repo', 'hello', '--case-sensitive'
+        ])
+        assert result.exit_code == 0
 
     def test_cli_error_handling(self):
         """Test CLI error handling."""
-        with self.runner.isolated_filesystem():
-            create_db_and_tables()
+        create_db_and_tables()
 
-            # Test nonexistent repository
-            result = self.runner.invoke(app, ['find', 'nonexistent', 'test'])
-            assert result.exit_code == 1
-            assert 'Error' in result.output
+        # Test nonexistent repository
+        result = self.runner.invoke(self.cli, ['find', 'nonexistent', 'test'])
+        assert result.exit_code == 1
+        assert 'Error' in result.output
 
     def test_cli_no_matches(self):
         """Test CLI behavior when no matches found."""
-        with self.runner.isolated_filesystem():
-            self._setup_test_repos()
+        self._setup_test_repos()
 
-            result = self.runner.invoke(app, [
-                'find', 'cli-test-repo', 'nonexistentpattern'
-            ])
-            assert result.exit_code == 0
-            assert 'No matches found' in result.output
+        result = self.runner.invoke(self.cli, [
+            'find', 'cli-test-repo', 'nonexistentpattern'
+        ])
+        assert result.exit_code == 0
+        assert 'No matches found' in result.output
 
     def test_cli_semantic_search_placeholder(self):
         """Test CLI semantic search placeholder."""
-        with self.runner.isolated_filesystem():
-            self._setup_test_repos()
+        self._setup_test_repos()
 
-            result = self.runner.invoke(app, [
-                'find', 'cli-test-repo', 'Hello', '-s'
-            ])
-            assert result.exit_code == 0
-            assert 'Semantic search not implemented yet' in result.output
+        result = self.runner.invoke(self.cli, [
+            'find', 'cli-test-repo', 'Hello', '-s'
+        ])
+        assert result.exit_code == 0
+        assert 'Semantic search not implemented yet' in result.output
+
+    def test_cli_interactive_launches_tui(self, monkeypatch):
+        """Test CLI interactive mode hands the results to the TUI."""
+        launches = []
+        monkeypatch.setattr(
+            main, 'launch_interactive_search',
+            lambda results, query, repo_path: launches.append(
+                (results, query, repo_path)
+            ),
+        )
+        local_path = self.register_hello_world('cli-test-repo')
 
-    def test_cli_interactive_placeholder(self):
-        """Test CLI interactive mode placeholder."""
-        with self.runner.isolated_filesystem():
-            self._setup_test_repos()
+        result = self.runner.invoke(self.cli, [
+            'find', 'cli-test-repo', 'Hello', '-i'
+        ])
+        assert result.exit_code == 0
+        assert 'Launching interactive TUI' in result.output
 
-            result = self.runner.invoke(app, [
-                'find', 'cli-test-repo', 'Hello', '-i'
-            ])
-            assert result.exit_code == 0
-            assert 'Interactive mode not implemented yet' in result.output
+        [(results, query, repo_path)] = launches
+        assert query == 'Hello'
+        assert repo_path == str(local_path)
+        assert any('Hello' in r.line_content for r in results)
 
 
+@pytest.mark.usefixtures("db_engine")
 class TestPerformanceAndEdgeCases:
     """Test performance characteristics and edge cases."""
 
-    def setup_method(self):
-        """Set up test environment."""
-        self.runner = CliRunner()
+    @pytest.fixture(autouse=True)
+    def _setup(self, runner, cli, tmp_path, monkeypatch):
+        """Set up test environment, inside this test's tmp_path."""
+        monkeypatch.chdir(tmp_path)
+        self.runner = runner
+        self.cli = cli
+
+    @pytest.fixture
+    def edge_repos(self, db_engine, hello_world_mirror, hello_world_checkout) -> Path:
+        """
+        Register the edge-case aliases in one transaction. Returns their path.
+
+        All of them point at the shared session checkout instead of a copy
+        each: their searches are answered by mock_ripgrep, so nothing reads
+        or writes the files.
+        """
+        aliases = ('edge-test', 'limit-test', 'special-test', 'cache-test')
+        add_repositories(
+            [(alias, hello_world_mirror, str(hello_world_checkout))
+             for alias in aliases],
+            db_path=db_engine.url.database,
+        )
+        return hello_world_checkout
 
-    def test_empty_query_handling(self):
+    def test_empty_query_handling(self, mock_ripgrep, edge_repos):
         """Test handling of empty queries."""
-        with self.runner.isolated_filesystem():
-            result = self.runner.invoke(app, [
-                'add', 'https://github.com/octocat/Hello-World.git', 'edge-test'
-            ])
-            assert result.exit_code == 0
 
-            searcher = RipgrepSearcher()
-            results = searcher.search_repository('edge-test', '')
+        searcher = RipgrepSearcher()
+        results = searcher.search_repository('edge-test', '')
 
-            # Empty query should return results (ripgrep behavior)
-            assert isinstance(results, list)
+        # Empty query is handed to ripgrep, which matches every line
+        assert mock_ripgrep[-1][-3:] == ['--', '', str(edge_repos)]
+        assert len(results) == 2
 
-    def test_large_result_limit(self):
+    @pytest.mark.usefixtures("edge_repos")
+    def test_large_result_limit(self, mock_ripgrep):
         """Test handling of large result limits."""
-        with self.runner.isolated_filesystem():
-            result = self.runner.invoke(app, [
-                'add', 'https://github.com/octocat/Hello-World.git', 'limit-test'
-            ])
-            assert result.exit_code == 0
-
-            searcher = RipgrepSearcher()
-            options = SearchOptions(max_results=10000)
-            results = searcher.search_repository('limit-test', '.', options)
-
-            assert isinstance(results, list)
-
-    def test_special_characters_in_query(self):
-        """Test handling of special characters in search queries."""
-        with self.runner.isolated_filesystem():
-            result = self.runner.invoke(app, [
-                'add', 'https://github.com/octocat/Hello-World.git', 'special-test'
-            ])
-            assert result.exit_code == 0
-
-            searcher = RipgrepSearcher()
-
-            # Test regex characters
-            special_queries = ['.*', '[a-z]', '\\w+', '(hello|world)']
-
-            for query in special_queries:
-                try:
-                    results = searcher.search_repository('special-test', query)
-                    assert isinstance(results, list)
-                except Exception:
-                    # Some regex patterns may fail, that's acceptable
-                    pass
+        searcher = RipgrepSearcher()
+        options = SearchOptions(max_results=10000)
+        results = searcher.search_repository('limit-test', '.', options)
+
+        command = mock_ripgrep[-1]
+        assert command[command.index('--max-count') + 1] == '10000'
+        # Fewer matches than the limit: all of them come back
+        assert [r.line_number for r in results] == [1, 3]
+
+    @pytest.mark.parametrize('query', ['.*', '[a-z]', '\\w+', '(hello|world)'])
+    @pytest.mark.usefixtures("edge_repos")
+    def test_special_characters_in_query(self, mock_ripgrep, query):
+        """Test handling of regex characters in search queries."""
+        searcher = RipgrepSearcher()
+        results = searcher.search_repository('special-test', query)
+
+        assert isinstance(results, list)
+        # Passed to ripgrep as a single argument, never through a shell
+        assert query in mock_ripgrep[-1]
 
     def test_cache_expiration(self):
-        """Test cache expiration functionality."""
-        with self.runner.isolated_filesystem():
-            result = self.runner.invoke(app, [
-                'add', 'https://github.com/octocat/Hello-World.git', 'cache-test'
-            ])
-            assert result.exit_code == 0
-
-            searcher = RipgrepSearcher(enable_cache=True)
-            options = SearchOptions()
-
-            # Perform search to populate cache
-            results = searcher.search_repository('cache-test', 'Hello', options)
-            assert len(results) > 0
-
-            # Manually expire cache
-            import datetime
-            searcher.cache.cache_ttl = datetime.timedelta(seconds=-1)
-
-            # Next search should not use cache
-            results2 = searcher.search_repository('cache-test', 'Hello', options)
-            assert len(results2) > 0
\ No newline at end of file
+        """Test expired entries are dropped instead of served."""
+        cache = SearchCache()
+        options = SearchOptions()
+        result = SearchResult('README', 1, 'Hello World!')
+
+        cache.set('repo', 'Hello', options, [result])
+        assert cache.get('repo', 'Hello', options) == [result]
+
+        # Every entry is older than a zero TTL
+        cache.cache_ttl_seconds = 0
+        assert cache.get('repo', 'Hello', options) is None
+        assert len(cache.cache) == 0
+
+    @pytest.mark.usefixtures("edge_repos")
+    def test_expired_cache_reruns_search(self, mock_ripgrep):
+        """Test the searcher runs ripgrep again once its cache expires."""
+        searcher = RipgrepSearcher(enable_cache=True)
+        options = SearchOptions()
+
+        # Perform search to populate cache
+        results = searcher.search_repository('cache-test', 'Hello', options)
+        assert len(results) > 0
+
+        # Manually expire cache
+        searcher.cache.cache_ttl_seconds = -1
+
+        # Next search should not use cache
+        results2 = searcher.search_repository('cache-test', 'Hello', options)
+        assert len(results2) > 0
+        assert len(mock_ripgrep) == 2
+
+    def test_cache_evicts_least_recently_used(self):
+        """Test the result cache stays within its size bound."""
+        cache = SearchCache(maxsize=2)
+        options = SearchOptions()
+        result = SearchResult('a.py', 1, 'Hello')
+
+        cache.set('repo', 'one', options, [result])
+        cache.set('repo', 'two', options, [])
+        assert cache.get('repo', 'one', options) == [result]  # Refresh 'one'
+
+        cache.set('repo', 'three', options, [])
+        assert len(cache.cache) == 2
+        assert cache.get('repo', 'two', options) is None
+        assert cache.get('repo', 'one', options)[0] is result
+
+    def test_max_results_caps_total_matches(self, tmp_path):
+        """Test max_results limits matches across files, not just per file."""
+        for i in range(5):
+            (tmp_path / f"file{i}.txt").write_text("Hello\nHello again\n")
+
+        searcher = RipgrepSearcher(enable_cache=False)
+        results = searcher._execute_search(
+            str(tmp_path), 'Hello', SearchOptions(max_results=3)
+        )
+
+        assert len(results) == 3
+        assert all(not r.file_path.startswith(str(tmp_path)) for r in results)
+
+    def test_disk_cache_round_trip(self, tmp_path):
+        """Test persisted results survive a new cache instance per revision."""
+        options = SearchOptions(context_before=1)
+        result = SearchResult('a.py', 2, 'Hello', 0, 5, ['before'], [])
+
+        DiskSearchCache(tmp_path / 'cache.sqlite').set(
+            'repo', 'Hello', options, 'abc123', [result]
+        )
+
+        cache = DiskSearchCache(tmp_path / 'cache.sqlite')
+        assert cache.get('repo', 'Hello', options, 'abc123') == [result]
+        assert cache.get('repo', 'Hello', options, 'def456') is None
+
+        cache.ttl_seconds = -1
+        cache.set('repo', 'Hello', options, 'abc123', [result])
+        assert cache.get('repo', 'Hello', options, 'abc123') is None
+
+    def test_disk_cache_ignores_broken_file(self, tmp_path):
+        """Test an unreadable cache file never breaks get, set or clear."""
+        path = tmp_path / 'cache.sqlite'
+        path.write_bytes(b'not a database' * 100)
+        cache = DiskSearchCache(path)
+        options = SearchOptions()
+
+        cache.set('repo', 'Hello', options, 'abc123', [])
+        assert cache.get('repo', 'Hello', options, 'abc123') is None
+        cache.clear()
@@ -6,8 +6,8 @@ import pytest
 from pathlib import Path
 from unittest.mock import patch, Mock
 
-from src.kodeklip.search import SearchResult
-from src.kodeklip.tui import (
+from kodeklip.search import SearchResult
+from kodeklip.tui import (
     SearchResultsTable,
     FilePreview,
     StatusBar,
@@ -69,7 +69,7 @@ class TestSearchResultsTable:
         ]
 
         table = SearchResultsTable(results)
-        table.selected_rows.add(0)
+        table.toggle_row_selection(0)
 
         selected = table.get_selected_results()
         assert len(selected) == 1
@@ -94,49 +94,73 @@ class TestSearchResultsTable:
 class TestFilePreview:
     """Test FilePreview widget."""
 
-    def test_detect_language(self):
+    @pytest.mark.parametrize(
+        ("file_path", "language"),
+        [
+            ("test.py", "python"),
+            ("test.js", "javascript"),
+            ("test.rs", "rust"),
+            ("test.go", "go"),
+            ("test.java", "java"),
+            ("test.unknown", None),  # Unknown extension
+            ("Makefile", None),  # No extension
+        ],
+    )
+    def test_detect_language(self, file_path, language):
         """Test programming language detection."""
-        preview = FilePreview()
+        assert FilePreview().detect_language(file_path) == language
 
-        # Test known extensions
-        assert preview._detect_language("test.py") == "python"
-        assert preview._detect_language("test.js") == "javascript"
-        assert preview._detect_language("test.rs") == "rust"
-        assert preview._detect_language("test.go") == "go"
-        assert preview._detect_language("test.java") == "java"
+    def test_read_window_large_file(self, tmp_path):
+        """Test reading only the context window from a memory-mapped file."""
+        big_file = tmp_path / "big.py"
+        big_file.write_text("".join(f"line {i}\n" for i in range(1, 20001)))
+        binary_file = tmp_path / "blob.bin"
+        binary_file.write_bytes(b"\x00" * 2048)
 
-        # Test unknown extension
-        assert preview._detect_language("test.unknown") is None
+        preview = FilePreview()
+        lines, start = preview._read_window(big_file, 15000, 10)
+
+        assert start == 14989
+        assert lines[0] == "line 14990"
+        assert lines[10] == "line 15000"
+        assert lines[-1] == "line 15010"
+        assert preview._read_window(binary_file, 1, 10) is None
+
+    def test_read_window_after_edit(self, tmp_path):
+        """Test the cached line index is rebuilt when the file changes."""
+        big_file = tmp_path / "big.py"
+        big_file.write_text("".join(f"line {i}\n" for i in range(1, 20001)))
+        preview = FilePreview()
+        assert preview._read_window(big_file, 100, 0) == (["line 100"], 99)
 
-        # Test no extension
-        assert preview._detect_language("Makefile") is None
+        big_file.write_text("".join(f"row {i}\n" for i in range(1, 30001)))
+        assert preview._read_window(big_file, 25000, 0) == (["row 25000"], 24999)
 
-    @patch('pathlib.Path.exists')
-    @patch('pathlib.Path.read_text')
-    def test_show_result_file_exists(self, mock_read_text, mock_exists):
+    def test_show_result_file_exists(self, tmp_path):
         """Test showing a result when file exists."""
-        mock_exists.return_value = True
-        mock_read_text.return_value = "line 1\nline 2\nline 3\n"
+        (tmp_path / "test.py").write_text("line 1\nline 2\nline 3\n")
 
         preview = FilePreview()
         result = SearchResult("test.py", 2, "line 2")
 
-        preview.show_result(result, "/tmp")
+        with patch.object(preview, 'write') as write:
+            preview.show_result(result, str(tmp_path))
 
-        mock_exists.assert_called_once()
-        mock_read_text.assert_called_once()
+        (syntax,), _ = write.call_args
+        assert syntax.code == "line 1\nline 2\nline 3"
+        assert syntax.highlight_lines == {2}
 
-    @patch('pathlib.Path.exists')
-    def test_show_result_file_not_exists(self, mock_exists):
+    def test_show_result_file_not_exists(self, tmp_path):
         """Test showing a result when file doesn't exist."""
-        mock_exists.return_value = False
-
         preview = FilePreview()
         result = SearchResult("missing.py", 1, "line 1")
 
-        preview.show_result(result, "/tmp")
+        with patch.object(preview, 'write') as write:
+            preview.show_result(result, str(tmp_path))
 
-        mock_exists.assert_called_once()
+        write.assert_called_once_with(
+            f"[red]File not found: {tmp_path / 'missing.py'}[/red]"
+        )
 
 
 class TestStatusBar:
@@ -155,29 +179,32 @@ class TestStatusBar:
         status_bar.update_status(0, 0, 0)
 
 
+@pytest.fixture(scope="class")
+def sample_app():
+    """One SearchApp shared by the tests of a class that only read its state."""
+    results = [
+        SearchResult("test1.py", 10, "def function1():"),
+        SearchResult("test2.py", 20, "def function2():"),
+    ]
+    return SearchApp(results, "def", "/tmp")
+
+
 class TestSearchApp:
     """Test SearchApp main application."""
 
-    def test_initialization(self):
+    def test_initialization(self, sample_app):
         """Test app initialization."""
-        results = [SearchResult("test.py", 1, "line 1")]
-        query = "test"
-        repo_path = "/tmp"
-
-        app = SearchApp(results, query, repo_path)
-        assert app.results == results
-        assert app.query == query
-        assert app.repo_path == repo_path
-
-    def test_format_results_for_clipboard(self):
-        """Test clipboard formatting."""
-        results = [
+        assert sample_app.results == [
             SearchResult("test1.py", 10, "def function1():"),
             SearchResult("test2.py", 20, "def function2():"),
         ]
+        assert sample_app.search_query == "def"
+        assert sample_app.repo_path == "/tmp"
 
-        app = SearchApp(results, "def", "/tmp")
-        formatted = app._format_results_for_clipboard(results)
+    def test_format_results_for_clipboard(self, sample_app):
+        """Test clipboard formatting."""
+        results = sample_app.results
+        formatted = sample_app._format_results_for_clipboard(results)
 
         assert "# KodeKlip Search Results: 'def'" in formatted
         assert "# 2 results" in formatted
@@ -194,17 +221,16 @@ class TestSearchApp:
 
         # Test yank current (single line)
         with patch.object(app, 'query_one') as mock_query:
-            mock_table = Mock()
+            mock_table = Mock(spec=SearchResultsTable)
             mock_table.get_current_result.return_value = results[0]
             mock_query.return_value = mock_table
 
             app.action_yank_current()
             mock_copy.assert_called_with("import os")
 
-    def test_action_methods_exist(self):
+    def test_action_methods_exist(self, sample_app):
         """Test that all action methods exist."""
-        results = [SearchResult("test.py", 1, "line 1")]
-        app = SearchApp(results, "test", "/tmp")
+        app = sample_app
 
         # Verify action methods exist
         assert hasattr(app, 'action_next_result')
@@ -225,7 +251,7 @@ class TestLaunchInteractiveSearch:
         captured = capsys.readouterr()
         assert "No results to display interactively" in captured.out
 
-    @patch('src.kodeklip.tui.SearchApp.run')
+    @patch('kodeklip.tui.SearchApp.run')
     def test_launch_with_results(self, mock_run):
         """Test launching with results."""
         results = [SearchResult("test.py", 1, "line 1")]
@@ -237,7 +263,7 @@ class TestLaunchInteractiveSearch:
 class TestIntegration:
     """Integration tests for TUI components."""
 
-    def test_full_workflow_simulation(self):
+    def test_full_workflow_simulation(self, sample_app):
         """Test a simulated full workflow."""
         # Create test data
         results = [
@@ -262,9 +288,8 @@ class TestIntegration:
         status_bar = StatusBar()
         status_bar.update_status(2, 0, 3)  # 2 selected, current index 0, total 3
 
-        # Test app initialization
-        app = SearchApp(results, "def", "/home/user/project")
-        formatted = app._format_results_for_clipboard(selected)
+        # Test clipboard formatting of the selection
+        formatted = sample_app._format_results_for_clipboard(selected)
         assert "2 results" in formatted
 
 
@@ -275,15 +300,10 @@ class TestRealWorldScenarios:
     def test_large_result_set(self):
         """Test handling large result sets."""
         # Create 1000 results
-        results = []
-        for i in range(1000):
-            results.append(
-                SearchResult(
-                    f"file_{i}.py",
-                    i + 1,
-                    f"def function_{i}():",
-                )
-            )
+        results = [
+            SearchResult(f"file_{i}.py", i + 1, f"def function_{i}():")
+            for i in range(1000)
+        ]
 
         table = SearchResultsTable(results)
         assert len(table.results) == 1000